@@ -6,6 +6,7 @@
 from __future__ import with_statement
 from alembic import context
 from sqlalchemy import engine_from_config, pool
+from sqlalchemy.engine import make_url
 from logging.config import fileConfig
 import os
 
@@ -15,7 +16,10 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 # Force sync URL for migrations if async driver is set
-sync_url = config.get_main_option("sqlalchemy.url").replace("sqlite+aiosqlite", "sqlite+pysqlite")
+url = make_url(config.get_main_option("sqlalchemy.url"))
+if url.drivername == "sqlite+aiosqlite":
+    url = url.set(drivername="sqlite+pysqlite")
+sync_url = url.render_as_string(hide_password=False)
 config.set_main_option("sqlalchemy.url", sync_url)
 
 def run_migrations_offline():
@@ -35,7 +39,8 @@ def run_migrations_online():
     connectable = engine_from_config(
         configuration,
         prefix="sqlalchemy.",
-        poolclass=pool.NullPool,
+        # SQLite: jedno połączenie współdzielone przez całą migrację
+        poolclass=pool.StaticPool if url.get_backend_name() == "sqlite" else pool.NullPool,
     )
     with connectable.connect() as connection:
         context.configure(connection=connection, target_metadata=None)
@@ -5,8 +5,11 @@ Zarządzanie wszystkimi ustawieniami i zmiennymi środowiskowymi.
 """
 
 import os
-from typing import List, Optional
-from decouple import config
+from pathlib import Path
+from types import SimpleNamespace
+from functools import cached_property, lru_cache
+from typing import Any, Dict, List, Optional, Set
+from decouple import RepositoryEnv
 from enum import Enum
 
 
@@ -25,76 +28,142 @@ class BotMode(str, Enum):
     WEBHOOK = "webhook"
 
 
+# Migawka najczęściej czytanych pól (wypełniana przez Settings.__init__)
+HOT = SimpleNamespace(owner_id=None, admins=frozenset(), admin_cmd='pusher')
+
+# Katalogi już utworzone/sprawdzone w tym procesie
+_dirs_seen: Set[str] = set()
+
+
+def _find_env_file() -> Optional[Path]:
+    """Szuka pliku .env od katalogu config/ w górę (jak AutoConfig z decouple)."""
+    here = Path(__file__).resolve().parent
+    for d in (here, *here.parents):
+        if (d / '.env').is_file():
+            return d / '.env'
+    return None
+
+
+def _load_env() -> Dict[str, str]:
+    """Jednorazowy odczyt .env + os.environ (środowisko ma pierwszeństwo)."""
+    env_file = _find_env_file()
+    data = dict(RepositoryEnv(str(env_file)).data) if env_file else {}
+    data.update(os.environ)
+    return data
+
+
+_RAW: Dict[str, str] = _load_env()
+
+_BOOLEANS = {
+    '1': True, 'yes': True, 'true': True, 'on': True,
+    '0': False, 'no': False, 'false': False, 'off': False, '': False,
+}
+
+
+def _to_bool(value: Any) -> bool:
+    value = str(value).lower()
+    if value not in _BOOLEANS:
+        raise ValueError(f"Nieprawidłowa wartość logiczna: {value}")
+    return _BOOLEANS[value]
+
+
+@lru_cache(maxsize=None)
+def _get(name: str, cast: Any = None, default: Any = None) -> Any:
+    """Odczyt zmiennej z migawki środowiska z pamięcią podręczną (jeden odczyt na klucz)."""
+    value = _RAW.get(name, default)
+    if cast is None or value is None:
+        return value
+    return _to_bool(value) if cast is bool else cast(value)
+
+
+def _env(name: str, cast: Any = None, default: Any = None) -> cached_property:
+    """Leniwe pole konfiguracji - wartość czytana przy pierwszym dostępie."""
+    return cached_property(lambda self: _get(name, cast, default))
+
+
 class Settings:
-    """Konfiguracja aplikacji."""
+    """Konfiguracja aplikacji.
+
+    Pola są leniwe (``cached_property``): zmienna jest czytana i rzutowana
+    przy pierwszym dostępie, więc nieużywane sekcje (webhook, TLS, Redis)
+    nic nie kosztują. ``_validate_config`` dotyka tylko pól wymaganych.
+    """
     
     # Bot Configuration
-    BOT_TOKEN: str = config('BOT_TOKEN')
-    BOT_MODE: BotMode = BotMode(config('BOT_MODE', default='polling'))
+    BOT_TOKEN: str = _env('BOT_TOKEN')
+    BOT_MODE: BotMode = _env('BOT_MODE', BotMode, 'polling')
     
     # Admin Configuration
-    ADMIN_USERS: List[int] = [
-        int(x.strip()) for x in config('ADMIN_USERS', default='').split(',')
-        if x.strip() and x.strip().isdigit()
-    ]
-    OWNER_ID: Optional[int] = config('OWNER_ID', cast=int, default=None)
-    ADMIN_COMMAND: str = config('ADMIN_COMMAND', default='pusher')
+    @cached_property
+    def ADMIN_USERS(self) -> List[int]:
+        raw = _get('ADMIN_USERS', default='')
+        return [int(t) for t in (x.strip() for x in raw.split(',')) if t and t.lstrip('-').isdigit()]
+
+    OWNER_ID: Optional[int] = _env('OWNER_ID', int, None)
+    ADMIN_COMMAND: str = _env('ADMIN_COMMAND', default='pusher')
     
     # Time Configuration
-    TIMEZONE: str = config('TIMEZONE', default='Europe/Warsaw')
-    DEFAULT_INTERVAL: int = config('DEFAULT_INTERVAL', cast=int, default=300)
-    DST_SAFE_MODE: bool = config('DST_SAFE_MODE', cast=bool, default=True)
+    TIMEZONE: str = _env('TIMEZONE', default='Europe/Warsaw')
+    DEFAULT_INTERVAL: int = _env('DEFAULT_INTERVAL', int, 300)
+    DST_SAFE_MODE: bool = _env('DST_SAFE_MODE', bool, True)
+    MAX_CONCURRENT_JOBS: int = _env('MAX_CONCURRENT_JOBS', int, 5)
     
     # Database Configuration
-    DB_URL: str = config('DB_URL', default='sqlite+aiosqlite:///./data/bot.db')
-    DB_POOL_SIZE: int = config('DB_POOL_SIZE', cast=int, default=10)
-    DB_MAX_OVERFLOW: int = config('DB_MAX_OVERFLOW', cast=int, default=20)
+    DB_URL: str = _env('DB_URL', default='sqlite+aiosqlite:///./data/bot.db')
+    DB_POOL_SIZE: int = _env('DB_POOL_SIZE', int, 10)
+    DB_MAX_OVERFLOW: int = _env('DB_MAX_OVERFLOW', int, 20)
+    DB_POOL_RECYCLE: int = _env('DB_POOL_RECYCLE', int, 1800)
+    DB_POOL_PRE_PING: bool = _env('DB_POOL_PRE_PING', bool, True)
     
     # Security Configuration
-    ENC_MASTER_KEY: str = config('ENC_MASTER_KEY')
-    SESSION_TIMEOUT: int = config('SESSION_TIMEOUT', cast=int, default=3600)
-    MAX_SESSIONS_PER_USER: int = config('MAX_SESSIONS_PER_USER', cast=int, default=5)
+    ENC_MASTER_KEY: str = _env('ENC_MASTER_KEY')
+    SESSION_TIMEOUT: int = _env('SESSION_TIMEOUT', int, 3600)
+    MAX_SESSIONS_PER_USER: int = _env('MAX_SESSIONS_PER_USER', int, 5)
+    MAX_SESSIONS: int = _env('MAX_SESSIONS', int, 10000)
     
     # Rate Limiting Configuration
-    RATE_LIMIT_RPS: float = config('RATE_LIMIT_RPS', cast=float, default=1.0)
-    RATE_LIMIT_BURST: int = config('RATE_LIMIT_BURST', cast=int, default=5)
-    FLOOD_CONTROL_THRESHOLD: int = config('FLOOD_CONTROL_THRESHOLD', cast=int, default=10)
-    FLOOD_CONTROL_WINDOW: int = config('FLOOD_CONTROL_WINDOW', cast=int, default=60)
+    RATE_LIMIT_RPS: float = _env('RATE_LIMIT_RPS', float, 1.0)
+    RATE_LIMIT_BURST: int = _env('RATE_LIMIT_BURST', int, 5)
+    FLOOD_CONTROL_THRESHOLD: int = _env('FLOOD_CONTROL_THRESHOLD', int, 10)
+    FLOOD_CONTROL_WINDOW: int = _env('FLOOD_CONTROL_WINDOW', int, 60)
     
     # Webhook Configuration (production)
-    WEBHOOK_HOST: str = config('WEBHOOK_HOST', default='localhost')
-    WEBHOOK_PORT: int = config('WEBHOOK_PORT', cast=int, default=8443)
-    WEBHOOK_PATH: str = config('WEBHOOK_PATH', default='/webhook')
-    WEBHOOK_URL: str = config('WEBHOOK_URL', default='')
+    WEBHOOK_HOST: str = _env('WEBHOOK_HOST', default='localhost')
+    WEBHOOK_PORT: int = _env('WEBHOOK_PORT', int, 8443)
+    WEBHOOK_PATH: str = _env('WEBHOOK_PATH', default='/webhook')
+    WEBHOOK_URL: str = _env('WEBHOOK_URL', default='')
     
     # TLS Configuration
-    TLS_CERT_PATH: str = config('TLS_CERT_PATH', default='certs/cert.pem')
-    TLS_KEY_PATH: str = config('TLS_KEY_PATH', default='certs/private.key')
+    TLS_CERT_PATH: str = _env('TLS_CERT_PATH', default='certs/cert.pem')
+    TLS_KEY_PATH: str = _env('TLS_KEY_PATH', default='certs/private.key')
     
     # Logging Configuration
-    LOG_LEVEL: LogLevel = LogLevel(config('LOG_LEVEL', default='INFO'))
-    LOG_FILE: str = config('LOG_FILE', default='logs/bot.log')
-    LOG_MAX_SIZE: int = config('LOG_MAX_SIZE', cast=int, default=10*1024*1024)  # 10MB
-    LOG_BACKUP_COUNT: int = config('LOG_BACKUP_COUNT', cast=int, default=5)
+    LOG_LEVEL: LogLevel = _env('LOG_LEVEL', LogLevel, 'INFO')
+    LOG_FILE: str = _env('LOG_FILE', default='logs/bot.log')
+    LOG_MAX_SIZE: int = _env('LOG_MAX_SIZE', int, 10*1024*1024)  # 10MB
+    LOG_BACKUP_COUNT: int = _env('LOG_BACKUP_COUNT', int, 5)
     
     # Redis Configuration (optional)
-    REDIS_URL: str = config('REDIS_URL', default='redis://localhost:6379/0')
-    REDIS_ENABLED: bool = config('REDIS_ENABLED', cast=bool, default=False)
+    REDIS_URL: str = _env('REDIS_URL', default='redis://localhost:6379/0')
+    REDIS_ENABLED: bool = _env('REDIS_ENABLED', bool, False)
     
     # Telemetry Configuration
-    TELEMETRY_ENABLED: bool = config('TELEMETRY_ENABLED', cast=bool, default=True)
-    HEALTH_CHECK_INTERVAL: int = config('HEALTH_CHECK_INTERVAL', cast=int, default=300)
+    TELEMETRY_ENABLED: bool = _env('TELEMETRY_ENABLED', bool, True)
+    HEALTH_CHECK_INTERVAL: int = _env('HEALTH_CHECK_INTERVAL', int, 300)
     
     # Development Configuration
-    DEBUG: bool = config('DEBUG', cast=bool, default=False)
-    TESTING: bool = config('TESTING', cast=bool, default=False)
+    DEBUG: bool = _env('DEBUG', bool, False)
+    TESTING: bool = _env('TESTING', bool, False)
     
     # Contact Information
-    CONTACT_INFO: str = config('CONTACT_INFO', default='Administrator')
+    CONTACT_INFO: str = _env('CONTACT_INFO', default='Administrator')
     
     def __init__(self):
         """Walidacja konfiguracji."""
         self._validate_config()
+        HOT.owner_id = self.OWNER_ID
+        HOT.admins = self._admin_set
+        HOT.admin_cmd = self.ADMIN_COMMAND
     
     def _validate_config(self):
         """Walidacja konfiguracji."""
@@ -112,11 +181,19 @@ class Settings:
         
         if self.OWNER_ID and self.OWNER_ID not in self.ADMIN_USERS:
             self.ADMIN_USERS.insert(0, self.OWNER_ID)
+        self._admin_set = frozenset(self.ADMIN_USERS)
+        self._admin_users_str = ', '.join(map(str, self.ADMIN_USERS))
         
         # Tworzenie katalogów
-        os.makedirs(os.path.dirname(self.LOG_FILE), exist_ok=True)
+        dirs = [os.path.dirname(self.LOG_FILE)]
         if 'sqlite' in self.DB_URL:
-            os.makedirs(os.path.dirname(self.DB_URL.split('///')[-1]), exist_ok=True)
+            dirs.append(os.path.dirname(self.DB_URL.split('///')[-1]))
+        for d in dirs:
+            if d in _dirs_seen:
+                continue
+            if not os.path.isdir(d):
+                os.makedirs(d, exist_ok=True)
+            _dirs_seen.add(d)
     
     @property
     def is_development(self) -> bool:
@@ -128,7 +205,7 @@ class Settings:
         """Sprawdza czy bot działa w trybie webhook."""
         return self.BOT_MODE == BotMode.WEBHOOK
     
-    @property
+    @cached_property
     def full_webhook_url(self) -> str:
         """Pełny URL webhooka."""
         if not self.is_webhook_mode:
@@ -137,12 +214,18 @@ class Settings:
     
     def get_admin_users_str(self) -> str:
         """Zwraca listę administratorów jako string."""
-        return ', '.join(map(str, self.ADMIN_USERS))
+        return self._admin_users_str
     
     def is_admin(self, user_id: int) -> bool:
         """Sprawdza czy użytkownik jest administratorem."""
-        return user_id in self.ADMIN_USERS
+        return user_id in self._admin_set
     
     def is_owner(self, user_id: int) -> bool:
         """Sprawdza czy użytkownik jest właścicielem."""
-        return self.OWNER_ID and user_id == self.OWNER_ID
\ No newline at end of file
+        return self.OWNER_ID and user_id == self.OWNER_ID
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Jedna instancja Settings na proces (parsowanie i walidacja tylko raz)."""
+    return Settings()
@@ -6,7 +6,7 @@ Zarządza życiem bota, rejestruje handlery i obsługuje pętlę zdarzeń.
 
 import asyncio
 import logging
-from typing import Optional
+from typing import Dict, Optional
 
 from telegram import Bot
 from telegram.ext import Application, ContextTypes
@@ -24,6 +24,9 @@ from handlers.user_commands import UserCommandsHandler
 from handlers.group_manager import GroupManagerHandler
 
 
+_ERROR_MSG = "⚠️ Krytyczny błąd bota:\n{}"
+
+
 class BotManager:
     """Główny manager bota Telegram."""
     
@@ -47,6 +50,19 @@ class BotManager:
         self.group_handler: Optional[GroupManagerHandler] = None
         
         self._is_running = False
+        
+        # Gotowe treści powiadomień dla właściciela
+        self._started_msg = (
+            f"✅ **Bot uruchomiony**\n\n"
+            f"Tryb: {settings.BOT_MODE}\n"
+            f"Strefa czasowa: {settings.TIMEZONE}\n"
+            f"Administratorzy: {len(settings.ADMIN_USERS)}\n"
+            f"Wersja: 1.0.0"
+        )
+        self._stopping_msg = "⏹️ **Bot zatrzymywany...** Sesje użytkowników zostają zapisane."
+        
+        # Klasyfikacja typów błędów (czy powiadamiać właściciela), liczona raz na typ
+        self._notify_error_types: Dict[type, bool] = {}
     
     async def initialize(self):
         """Inicjalizacja managera bota."""
@@ -79,24 +95,22 @@ class BotManager:
     
     async def _initialize_components(self):
         """Inicjalizacja wszystkich komponentów."""
-        # User Manager
+        # User Manager i Scheduler są niezależne - inicjalizacja równoległa
         self.user_manager = UserManager(self.db_manager, self.settings)
-        await self.user_manager.initialize()
+        self.scheduler = SchedulerManager(self.settings)
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(self.user_manager.initialize())
+            tg.create_task(self.scheduler.initialize())
         
         # Rate Limiter
         self.rate_limiter = RateLimiter(
-            max_calls=int(self.settings.RATE_LIMIT_RPS),
-            time_window=1.0,
-            burst_limit=self.settings.RATE_LIMIT_BURST
+            rps=self.settings.RATE_LIMIT_RPS,
+            burst=self.settings.RATE_LIMIT_BURST
         )
         
         # Command Bus
         self.command_bus = CommandBus(self.user_manager, self.rate_limiter)
         
-        # Scheduler
-        self.scheduler = SchedulerManager(self.settings)
-        await self.scheduler.initialize()
-        
         # Handlery
         self.admin_handler = AdminCommandsHandler(self.settings, self.db_manager, self.user_manager, self.scheduler)
         self.user_handler = UserCommandsHandler(self.settings, self.user_manager)
@@ -105,12 +119,15 @@ class BotManager:
     async def _register_handlers(self):
         """Rejestracja wszystkich handlerów."""
         # Rejestracja handlerów w command bus
-        await self.admin_handler.register_handlers(self.application, self.command_bus)
-        await self.user_handler.register_handlers(self.application, self.command_bus)
-        await self.group_handler.register_handlers(self.application, self.command_bus)
+        await asyncio.gather(
+            self.admin_handler.register_handlers(self.application, self.command_bus),
+            self.user_handler.register_handlers(self.application, self.command_bus),
+            self.group_handler.register_handlers(self.application, self.command_bus),
+        )
         
         # Rejestracja middleware w aplikacji
-        self.application.add_handler(self.command_bus.create_message_handler(), group=-1)
+        for handler in self.command_bus.create_handlers():
+            self.application.add_handler(handler, group=-1)
     
     async def start(self):
         """Uruchomienie bota."""
@@ -164,51 +181,74 @@ class BotManager:
         )
     
     async def stop(self):
-        """Zatrzymanie bota."""
-        try:
-            if not self._is_running:
-                return
-            
+        """
+        Zatrzymanie bota. Zamyka wszystko, co zdążyło powstać - także po nieudanym
+        initialize()/start() - więc jest bezpieczne do wywołania w każdym stanie.
+        """
+        if self._is_running:
             self.logger.info("Zatrzymywanie bota...")
-            
             # Wysłanie powiadomienia do właściciela
             await self._notify_owner_bot_stopping()
-            
-            # Zatrzymanie schedulera
-            if self.scheduler:
-                await self.scheduler.stop()
-            
-            # Zatrzymanie aplikacji
-            if self.application:
-                await self.application.updater.stop()
-                await self.application.stop()
-                await self.application.shutdown()
-            
+
+        # Najpierw PTB (koniec nowych update'ów), repo admina zamykane na końcu -
+        # inaczej zapis z obsługiwanego jeszcze update'u trafiłby do zamkniętego pliku
+        steps = []
+        if self.application:
+            steps.append(self._stop_application)
+        if self.scheduler:
+            steps.append(self.scheduler.stop)
+        if self.user_manager:
+            steps.append(self.user_manager.close)
+        if self.admin_handler:
+            steps.append(self.admin_handler.close)
+
+        # Każdy krok osobno - błąd jednego nie pomija pozostałych
+        for step in steps:
+            try:
+                await step()
+            except Exception as e:
+                self.logger.error("Błąd zatrzymywania bota: %s", e)
+
+        if self._is_running:
             self._is_running = False
             self.logger.info("Bot zatrzymany pomyślnie")
-            
-        except Exception as e:
-            self.logger.error(f"Błąd zatrzymywania bota: {e}")
+
+    async def _stop_application(self):
+        app = self.application
+        if app.updater and app.updater.running:
+            await app.updater.stop()
+        if app.running:
+            await app.stop()
+        # shutdown() nic nie robi, gdy aplikacja nie została zainicjalizowana
+        await app.shutdown()
     
     async def _error_handler(self, update: object, context: ContextTypes.DEFAULT_TYPE):
         """Główny handler błędów."""
-        self.logger.error(f"Nieobsłużony błąd: {context.error}", exc_info=context.error)
+        self.logger.error("Nieobsłużony błąd: %s", context.error, exc_info=context.error)
         
         # Rejestracja błędu w telemetrii
         if self.telemetry:
             await self.telemetry.record_error(str(context.error))
         
         # Powiadomienie właściciela o krytycznych błędach
-        if self.settings.OWNER_ID and isinstance(context.error, TelegramError):
-            try:
-                error_msg = f"⚠️ Krytyczny błąd bota:\n```\n{str(context.error)[:1000]}\n```"
-                await self.bot.send_message(
-                    chat_id=self.settings.OWNER_ID,
-                    text=error_msg,
-                    parse_mode='Markdown'
-                )
-            except Exception as e:
-                self.logger.error(f"Nie udało się wysłać powiadomienia o błędzie: {e}")
+        if not self.settings.OWNER_ID:
+            return
+        
+        err_type = type(context.error)
+        notify = self._notify_error_types.get(err_type)
+        if notify is None:
+            notify = self._notify_error_types[err_type] = issubclass(err_type, TelegramError)
+        if not notify:
+            return
+        
+        try:
+            # Zwykły tekst: treść wyjątku nie jest parsowana jako Markdown
+            await self.bot.send_message(
+                chat_id=self.settings.OWNER_ID,
+                text=_ERROR_MSG.format(str(context.error)[:1000])
+            )
+        except Exception as e:
+            self.logger.error(f"Nie udało się wysłać powiadomienia o błędzie: {e}")
     
     async def _notify_owner_bot_started(self):
         """Powiadomienie właściciela o uruchomieniu bota."""
@@ -216,17 +256,9 @@ class BotManager:
             return
         
         try:
-            message = (
-                f"✅ **Bot uruchomiony**\n\n"
-                f"Tryb: {self.settings.BOT_MODE}\n"
-                f"Strefa czasowa: {self.settings.TIMEZONE}\n"
-                f"Administratorzy: {len(self.settings.ADMIN_USERS)}\n"
-                f"Wersja: 1.0.0"
-            )
-            
             await self.bot.send_message(
                 chat_id=self.settings.OWNER_ID,
-                text=message,
+                text=self._started_msg,
                 parse_mode='Markdown'
             )
         except Exception as e:
@@ -238,11 +270,9 @@ class BotManager:
             return
         
         try:
-            message = "⏹️ **Bot zatrzymywany...** Sesje użytkowników zostają zapisane."
-            
             await self.bot.send_message(
                 chat_id=self.settings.OWNER_ID,
-                text=message,
+                text=self._stopping_msg,
                 parse_mode='Markdown'
             )
         except Exception as e:
@@ -1,11 +1,12 @@
 # -*- coding: utf-8 -*-
 import logging
+from bisect import insort
 from dataclasses import dataclass
 from enum import Enum
-from typing import Callable, List, Optional
+from typing import Callable, Dict, List, Optional
 
 from telegram import Update
-from telegram.ext import ContextTypes, MessageHandler, filters
+from telegram.ext import BaseHandler, CallbackQueryHandler, ContextTypes, MessageHandler, filters
 
 from core.user_manager import UserManager
 
@@ -15,7 +16,7 @@ class Priority(int, Enum):
     NORMAL = 20
     LOW = 30
 
-@dataclass
+@dataclass(slots=True)
 class CommandHandler:
     name: str
     handler: Callable
@@ -25,12 +26,19 @@ class CommandHandler:
     requires_admin: bool = False
     states: Optional[List[str]] = None
 
+def _priority_key(h: CommandHandler) -> int:
+    return h.priority.value
+
 class CommandBus:
     def __init__(self, user_manager: UserManager, rate_limiter=None):
         self.user_manager = user_manager
         self.rate_limiter = rate_limiter
         self.logger = logging.getLogger(__name__)
         self.handlers: List[CommandHandler] = []
+        # Indeksy routingu budowane przy rejestracji
+        self._by_command: Dict[str, CommandHandler] = {}
+        self._by_state: Dict[str, List[CommandHandler]] = {}
+        self._fallback: List[CommandHandler] = []
 
     def register_handler(self, name: str, handler: Callable, *,
                          filter_func: Optional[Callable] = None,
@@ -38,11 +46,72 @@ class CommandBus:
                          requires_auth: bool = False,
                          requires_admin: bool = False,
                          states: Optional[List[str]] = None):
-        self.handlers.append(CommandHandler(name, handler, filter_func, priority, requires_auth, requires_admin, states))
-        self.handlers.sort(key=lambda h: h.priority.value)
+        h = CommandHandler(name, handler, filter_func, priority, requires_auth, requires_admin, states)
+        # insort_right: przy równym priorytecie zachowuje kolejność rejestracji
+        insort(self.handlers, h, key=_priority_key)
+        if name.startswith('/'):
+            self._by_command[name[1:].lower()] = h
+        elif states:
+            for state in states:
+                insort(self._by_state.setdefault(state, []), h, key=_priority_key)
+        else:
+            insort(self._fallback, h, key=_priority_key)
+
+    def _admit(self, update: Update) -> bool:
+        user = update.effective_user
+        if user is None or update.effective_chat is None:
+            return False
+        if self.rate_limiter and not self.rate_limiter.allow_request(user.id):
+            return False
+        return True
+
+    async def _on_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
+        if not self._by_command or not self._admit(update):
+            return False
+        cmd = update.effective_message.text.split(maxsplit=1)[0][1:].split('@', 1)[0].lower()
+        h = self._by_command.get(cmd)
+        if h is None:
+            return False
+        return await self._run(h, update, context)
+
+    async def _on_text(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
+        if not (self._by_state or self._fallback) or not self._admit(update):
+            return False
+        return await self._route(update, context)
 
-    async def dispatch(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
+    async def _on_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
+        if not (self._by_state or self._fallback) or not self._admit(update):
+            return False
+        return await self._route(update, context)
+
+    async def _route(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
+        if self._by_state:
+            session = await self.user_manager.get_session(update.effective_user.id, update.effective_chat.id)
+            state = getattr(session.state, 'value', session.state)
+            for h in self._by_state.get(state, ()):
+                if h.filter_func is None or h.filter_func(update):
+                    return await self._run(h, update, context)
+
+        for h in self._fallback:
+            if h.filter_func is None or h.filter_func(update):
+                return await self._run(h, update, context)
         return False
 
-    def create_message_handler(self) -> MessageHandler:
-        return MessageHandler(filters.ALL, self.dispatch)
+    async def _run(self, h: CommandHandler, update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
+        user_id = update.effective_user.id
+        if h.requires_admin and not self.user_manager.is_admin(user_id):
+            return False
+        if h.requires_auth:
+            session = await self.user_manager.get_session(user_id, update.effective_chat.id)
+            if not session.is_authenticated:
+                return False
+        await h.handler(update, context)
+        return True
+
+    def create_handlers(self) -> List[BaseHandler]:
+        """Wąskie handlery PTB - filtrowanie aktualizacji odbywa się w frameworku."""
+        return [
+            MessageHandler(filters.COMMAND, self._on_command),
+            MessageHandler(filters.TEXT & ~filters.COMMAND, self._on_text),
+            CallbackQueryHandler(self._on_callback),
+        ]
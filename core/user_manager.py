@@ -1,46 +1,92 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import logging
+import time
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from enum import Enum
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
 
 from config.settings import Settings
 
 def now_utc() -> datetime:
     return datetime.now(timezone.utc)
 
+def _now_ts() -> float:
+    return time.time()
+
 class SessionState(str, Enum):
     IDLE = "idle"
 
-@dataclass
+@dataclass(slots=True)
 class Session:
     user_id: int
     chat_id: int
     state: SessionState = SessionState.IDLE
     data: Dict[str, Any] = field(default_factory=dict)
-    updated_at: datetime = field(default_factory=now_utc)
+    updated_at: float = field(default_factory=_now_ts)  # epoch; datetime tylko przy zapisie
     is_authenticated: bool = False
 
+    @property
+    def updated_at_dt(self) -> datetime:
+        return datetime.fromtimestamp(self.updated_at, timezone.utc)
+
 class UserManager:
     def __init__(self, db_manager, settings: Settings):
         self.db_manager = db_manager
         self.settings = settings
-        self._sessions: Dict[str, Session] = {}
+        # Kolejność = ostatnie użycie (LRU); najstarsze sesje na początku
+        self._sessions: "OrderedDict[Tuple[int, int], Session]" = OrderedDict()
+        self._sweep_task: Optional[asyncio.Task] = None
         self.logger = logging.getLogger(__name__)
 
     async def initialize(self):
-        return
+        if self._sweep_task is None:
+            self._sweep_task = asyncio.create_task(self._sweep_loop())
+
+    async def close(self):
+        if self._sweep_task:
+            self._sweep_task.cancel()
+            self._sweep_task = None
 
     async def get_session(self, user_id: int, chat_id: int) -> Session:
-        key = f"{user_id}:{chat_id}"
-        if key not in self._sessions:
-            self._sessions[key] = Session(user_id=user_id, chat_id=chat_id)
-        return self._sessions[key]
+        key = (user_id, chat_id)
+        session = self._sessions.get(key)
+        if session is None:
+            session = Session(user_id=user_id, chat_id=chat_id)
+            self._sessions[key] = session
+            self._evict()
+        else:
+            session.updated_at = _now_ts()
+            self._sessions.move_to_end(key)
+        return session
 
     async def update_session(self, session: Session):
-        key = f"{session.user_id}:{session.chat_id}"
+        key = (session.user_id, session.chat_id)
+        session.updated_at = _now_ts()
         self._sessions[key] = session
+        self._sessions.move_to_end(key)
+        self._evict()
+
+    def _evict(self):
+        while len(self._sessions) > self.settings.MAX_SESSIONS:
+            self._sessions.popitem(last=False)
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(60)
+            # Kolejność LRU = kolejność updated_at, więc wygasłe są zawsze na początku
+            cutoff = _now_ts() - self.settings.SESSION_TIMEOUT
+            expired = 0
+            while self._sessions:
+                key, session = next(iter(self._sessions.items()))
+                if session.updated_at >= cutoff:
+                    break
+                del self._sessions[key]
+                expired += 1
+            if expired:
+                self.logger.debug("Usunięto wygasłe sesje: %d", expired)
 
     def is_admin(self, user_id: int) -> bool:
-        return user_id in self.settings.ADMIN_USERS
+        return self.settings.is_admin(user_id)
@@ -11,7 +11,7 @@ def now_utc():
     return datetime.now(timezone.utc)
 
 
-@dataclass
+@dataclass(slots=True)
 class BotSettings:
     id: int = 1
     info_name: Optional[str] = None       # @nazwa
@@ -23,7 +23,7 @@ class BotSettings:
     updated_at: datetime = field(default_factory=now_utc)
 
 
-@dataclass
+@dataclass(slots=True)
 class Group:
     chat_id: str
     username: Optional[str] = None
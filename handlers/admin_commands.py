@@ -4,32 +4,77 @@ from __future__ import annotations
 Admin Commands - safer partial updates for Set Info (no None checks on strings)
 """
 from dataclasses import dataclass
-from enum import Enum
-from typing import Optional
+from functools import lru_cache
+from typing import Final, List, Optional, Set, Tuple
+import asyncio
 import logging
+import re
 
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes, CommandHandler, CallbackQueryHandler, MessageHandler, filters
 
-from config.settings import Settings
+from config.settings import HOT, Settings
 from core.user_manager import UserManager
+from domain.models import BotSettings
 from infra.repo import Repo
 
 log = logging.getLogger(__name__)
 
-class AdminAction(str, Enum):
-    ROOT = "adm:root"
-    SET_INFO = "adm:set_info"
-    SET_CONTACT = "adm:set_contact"
-    TIME = "adm:time"
-    EX_TIME = "adm:ex_time"
-    GROUPS = "adm:groups"
-    GROUPS_ADD = "adm:groups:add"
-    GROUPS_DEL = "adm:groups:del"
-    GROUPS_LIST = "adm:groups:list"
-    EX_SET_GROUPS = "adm:ex:set_groups"
-    EX_DEL_GROUPS = "adm:ex:del_groups"
-    EX_SET_TIME = "adm:ex:set_time"
+_CB_PATTERN = re.compile(r"^adm:")
+# Niepusta linia bez białych znaków na brzegach - jeden skan w C zamiast splitlines()+strip()
+_TOKEN_RE = re.compile(r"^[^\S\n]*(\S(?:[^\n]*\S)?)", re.M)
+# group_id (np. -100123456789) lub @username
+_GROUP_RE = re.compile(r"^(?:-?\d{5,20}|@[A-Za-z0-9_]{3,32})$")
+
+class AdminAction:
+    """Wartości callback_data panelu admina (zwykłe stałe str, bez Enum)."""
+    ROOT: Final[str] = "adm:root"
+    SET_INFO: Final[str] = "adm:set_info"
+    SET_CONTACT: Final[str] = "adm:set_contact"
+    TIME: Final[str] = "adm:time"
+    EX_TIME: Final[str] = "adm:ex_time"
+    GROUPS: Final[str] = "adm:groups"
+    GROUPS_ADD: Final[str] = "adm:groups:add"
+    GROUPS_DEL: Final[str] = "adm:groups:del"
+    GROUPS_LIST: Final[str] = "adm:groups:list"
+    EX_SET_GROUPS: Final[str] = "adm:ex:set_groups"
+    EX_DEL_GROUPS: Final[str] = "adm:ex:del_groups"
+    EX_SET_TIME: Final[str] = "adm:ex:set_time"
+
+def _parse_group_ids(text: str) -> List[str]:
+    """Unikalne (kolejność zachowana) i poprawne składniowo group_id/@username."""
+    return [x for x in dict.fromkeys(_TOKEN_RE.findall(text)) if _GROUP_RE.match(x)]
+
+def _identity(text: str) -> str:
+    return text
+
+def _parse_minutes(text: str) -> int:
+    minutes = int(text)
+    if minutes < 1 or minutes > 1440:
+        raise ValueError(text)
+    return minutes
+
+def _parse_group_minutes(text: str) -> Tuple[str, int]:
+    """'group_id,minuty' -> (group_id, minuty); ValueError przy złym formacie."""
+    gid, sep, mins = text.partition(",")
+    if not sep:
+        raise ValueError(text)
+    return gid.strip(), _parse_minutes(mins.strip())
+
+@lru_cache(maxsize=8)
+def _fmt_root(name: str, channel: str, group: str, contact: str, interval: int) -> str:
+    return (
+        "Panel admina\n\n"
+        f"Name: {name}\n"
+        f"Channel: {channel}\n"
+        f"Group: {group}\n"
+        f"Contact: {contact}\n"
+        f"Global interval: {interval} min\n"
+    )
+
+def _render_root_text(s: BotSettings) -> str:
+    return _fmt_root(s.info_name or '-', s.info_channel or '-', s.info_group or '-',
+                     s.contact or '-', s.global_interval_min)
 
 @dataclass
 class AdminContext:
@@ -42,207 +87,294 @@ class AdminCommandsHandler:
         self.users = user_manager
         self.scheduler = scheduler
         self.repo = Repo()
+        self._settings_cache: Optional[BotSettings] = None
+        self._write_lock = asyncio.Lock()
+        self._bg_writes: Set[asyncio.Task] = set()
+        # Admini + właściciel (frozenset z migawki ustawień)
+        self._admin_ids: frozenset = HOT.admins
+
+        # Klawiatury są niezmienne - budowane raz
+        self._KB_ROOT = InlineKeyboardMarkup([
+            [InlineKeyboardButton("📝 Set Info", callback_data=AdminAction.SET_INFO)],
+            [InlineKeyboardButton("👤 Set Kontakt", callback_data=AdminAction.SET_CONTACT)],
+            [InlineKeyboardButton("⏰ Time", callback_data=AdminAction.TIME)],
+            [InlineKeyboardButton("⚙️ Ex-Time", callback_data=AdminAction.EX_TIME)],
+            [InlineKeyboardButton("📋 Groups", callback_data=AdminAction.GROUPS)],
+        ])
+        self._KB_EX_TIME = InlineKeyboardMarkup([
+            [InlineKeyboardButton("Set Groups", callback_data=AdminAction.EX_SET_GROUPS)],
+            [InlineKeyboardButton("Del Groups", callback_data=AdminAction.EX_DEL_GROUPS)],
+            [InlineKeyboardButton("Set Time", callback_data=AdminAction.EX_SET_TIME)],
+            [InlineKeyboardButton("⬅️ Back", callback_data=AdminAction.ROOT)],
+        ])
+        self._KB_GROUPS = InlineKeyboardMarkup([
+            [InlineKeyboardButton("Add Groups", callback_data=AdminAction.GROUPS_ADD)],
+            [InlineKeyboardButton("Del Groups", callback_data=AdminAction.GROUPS_DEL)],
+            [InlineKeyboardButton("List", callback_data=AdminAction.GROUPS_LIST)],
+            [InlineKeyboardButton("⬅️ Back", callback_data=AdminAction.ROOT)],
+        ])
+
+        # Tablice skoków: callback_data / stan awaiting -> metoda
+        self._cb_routes = {
+            AdminAction.ROOT: self._cb_root,
+            AdminAction.SET_INFO: self._cb_set_info,
+            AdminAction.SET_CONTACT: self._cb_set_contact,
+            AdminAction.TIME: self._cb_time,
+            AdminAction.EX_TIME: self._cb_ex_time,
+            AdminAction.GROUPS: self._cb_groups,
+            AdminAction.GROUPS_ADD: self._cb_groups_add,
+            AdminAction.GROUPS_DEL: self._cb_groups_del,
+            AdminAction.GROUPS_LIST: self._cb_groups_list,
+            AdminAction.EX_SET_GROUPS: self._cb_ex_set_groups,
+            AdminAction.EX_DEL_GROUPS: self._cb_ex_del_groups,
+            AdminAction.EX_SET_TIME: self._cb_ex_set_time,
+        }
+        self._app = None
+        self._text_handler: Optional[MessageHandler] = None
+        self._text_handler_on = False
+        self._awaiting_uids: Set[int] = set()
+        # Przepływy wejścia tekstowego: stan -> (parser, akcja, komunikat błędu parsera)
+        self._flows = {
+            "set_info": (_identity, self._do_set_info, None),
+            "set_contact": (_identity, self._do_set_contact, None),
+            "set_time_global": (_parse_minutes, self._do_set_time_global,
+                                "Nieprawidłowa wartość. Podaj liczbę minut 1–1440."),
+            "ex_set_groups": (_parse_group_ids, self._do_ex_set_groups, None),
+            "ex_del_groups": (_parse_group_ids, self._do_ex_del_groups, None),
+            "ex_set_time": (_parse_group_minutes, self._do_ex_set_time, "Format: group_id,minuty (1–1440)"),
+            "groups_add": (_parse_group_ids, self._do_groups_add, None),
+            "groups_del": (_parse_group_ids, self._do_groups_del, None),
+        }
 
     async def register_handlers(self, app, command_bus):
         app.add_handler(CommandHandler(self.settings.ADMIN_COMMAND, self._admin_root_cmd))
-        app.add_handler(CallbackQueryHandler(self._on_callback, pattern=r"^adm:"))
-        app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self._on_text_input))
+        app.add_handler(CommandHandler("status", self._status_cmd))
+        app.add_handler(CallbackQueryHandler(self._on_callback, pattern=_CB_PATTERN))
+        # Filtr po ID admina w PTB - tekst innych użytkowników nie trafia do handlera.
+        # Handler jest aktywny tylko gdy któryś admin czeka na wejście (patrz _sync_text_handler).
+        admins = filters.User(user_id=self._admin_ids)
+        self._app = app
+        self._text_handler = MessageHandler(filters.TEXT & ~filters.COMMAND & admins, self._on_text_input)
 
     async def _admin_root_cmd(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         uid = update.effective_user.id
-        if uid not in self.settings.ADMIN_USERS and uid != self.settings.OWNER_ID:
+        if uid not in self._admin_ids:
             await update.message.reply_text("⛔ Brak uprawnień")
             return
-        s = self.repo.get_settings()
+        s = self._cached_settings()
         await update.message.reply_text(
-            (
-                "Panel admina\n\n"
-                f"Name: {s.info_name or '-'}\n"
-                f"Channel: {s.info_channel or '-'}\n"
-                f"Group: {s.info_group or '-'}\n"
-                f"Contact: {s.contact or '-'}\n"
-                f"Global interval: {s.global_interval_min} min\n"
-            ),
+            _render_root_text(s),
             reply_markup=self._root_keyboard()
         )
 
+    async def _status_cmd(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        await update.message.reply_text("Status OK")
+
+    def _cached_settings(self) -> BotSettings:
+        if self._settings_cache is None:
+            self._settings_cache = self.repo.get_settings()
+        return self._settings_cache
+
+    def _save_settings(self, s: BotSettings):
+        """Cache od razu, zapis na dysk w tle (odpowiedź nie czeka na I/O)."""
+        self._settings_cache = s
+        task = asyncio.create_task(self._persist(self.repo.set_settings, s))
+        self._bg_writes.add(task)
+        task.add_done_callback(self._on_write_done)
+
+    async def _persist(self, fn, *args):
+        # Jeden zapis naraz - repo JSON nie jest bezpieczne dla równoległych zapisów
+        async with self._write_lock:
+            return await asyncio.to_thread(fn, *args)
+
+    async def close(self):
+        """Czeka na zapisy w tle i zamyka repo (snapshot + czyszczenie WAL)."""
+        if self._bg_writes:
+            await asyncio.gather(*self._bg_writes, return_exceptions=True)
+        await self._persist(self.repo.close)
+
+    def _on_write_done(self, task: asyncio.Task):
+        self._bg_writes.discard(task)
+        if not task.cancelled() and task.exception():
+            log.error("Zapis ustawień nie powiódł się: %s", task.exception())
+
     def _root_keyboard(self) -> InlineKeyboardMarkup:
-        kb = [
-            [InlineKeyboardButton("📝 Set Info", callback_data=AdminAction.SET_INFO)],
-            [InlineKeyboardButton("👤 Set Kontakt", callback_data=AdminAction.SET_CONTACT)],
-            [InlineKeyboardButton("⏰ Time", callback_data=AdminAction.TIME)],
-            [InlineKeyboardButton("⚙️ Ex-Time", callback_data=AdminAction.EX_TIME)],
-            [InlineKeyboardButton("📋 Groups", callback_data=AdminAction.GROUPS)],
-        ]
-        return InlineKeyboardMarkup(kb)
+        return self._KB_ROOT
 
     async def _on_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         q = update.callback_query
+        if q.from_user.id not in self._admin_ids:
+            await q.answer("⛔ Brak uprawnień", show_alert=True)
+            return
         await q.answer()
-        data = q.data
-        if data == AdminAction.SET_INFO:
-            await q.edit_message_text(
-                "Wyślij: @nazwa LUB @kanal LUB @grupa LUB [wiadomość] LUB CSV @nazwa,@kanal,@grupa,wiadomość"
-            )
-            self._set_admin_context(context, awaiting="set_info")
-        elif data == AdminAction.SET_CONTACT:
-            await q.edit_message_text("Wyślij nazwę kontaktu admina (np. @TwojNick)")
-            self._set_admin_context(context, awaiting="set_contact")
-        elif data == AdminAction.TIME:
-            await q.edit_message_text("Wyślij globalny interwał (minuty), np. 5")
-            self._set_admin_context(context, awaiting="set_time_global")
-        elif data == AdminAction.EX_TIME:
-            await q.edit_message_text(
-                "Ex-Time:\n- Set Groups (wykluczenia)\n- Del Groups\n- Set Time (per grupa)",
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton("Set Groups", callback_data=AdminAction.EX_SET_GROUPS)],
-                    [InlineKeyboardButton("Del Groups", callback_data=AdminAction.EX_DEL_GROUPS)],
-                    [InlineKeyboardButton("Set Time", callback_data=AdminAction.EX_SET_TIME)],
-                    [InlineKeyboardButton("⬅️ Back", callback_data=AdminAction.ROOT)],
-                ])
-            )
-            self._set_admin_context(context, awaiting=None)
-        elif data == AdminAction.GROUPS:
-            await q.edit_message_text(
-                "Groups:\n- Add Groups\n- Del Groups\n- List",
-                reply_markup=InlineKeyboardMarkup([
-                    [InlineKeyboardButton("Add Groups", callback_data=AdminAction.GROUPS_ADD)],
-                    [InlineKeyboardButton("Del Groups", callback_data=AdminAction.GROUPS_DEL)],
-                    [InlineKeyboardButton("List", callback_data=AdminAction.GROUPS_LIST)],
-                    [InlineKeyboardButton("⬅️ Back", callback_data=AdminAction.ROOT)],
-                ])
-            )
-            self._set_admin_context(context, awaiting=None)
-        elif data == AdminAction.ROOT:
-            s = self.repo.get_settings()
-            await q.edit_message_text(
-                (
-                    "Panel admina\n\n"
-                    f"Name: {s.info_name or '-'}\n"
-                    f"Channel: {s.info_channel or '-'}\n"
-                    f"Group: {s.info_group or '-'}\n"
-                    f"Contact: {s.contact or '-'}\n"
-                    f"Global interval: {s.global_interval_min} min\n"
-                ),
-                reply_markup=self._root_keyboard()
-            )
-            self._set_admin_context(context, awaiting=None)
-        elif data == AdminAction.EX_SET_GROUPS:
-            await q.edit_message_text("Wklej listę group_id (każde w nowej linii) do wykluczenia z globalnego czasu:")
-            self._set_admin_context(context, awaiting="ex_set_groups")
-        elif data == AdminAction.EX_DEL_GROUPS:
-            await q.edit_message_text("Wklej listę group_id do usunięcia z wykluczeń:")
-            self._set_admin_context(context, awaiting="ex_del_groups")
-        elif data == AdminAction.EX_SET_TIME:
-            await q.edit_message_text("Podaj: group_id,minuty (np. -100123456789,3)")
-            self._set_admin_context(context, awaiting="ex_set_time")
-        elif data == AdminAction.GROUPS_ADD:
-            await q.edit_message_text("Wklej listę group_id lub @username (po jednej pozycji w linii):")
-            self._set_admin_context(context, awaiting="groups_add")
-        elif data == AdminAction.GROUPS_DEL:
-            await q.edit_message_text("Wklej listę group_id do usunięcia:")
-            self._set_admin_context(context, awaiting="groups_del")
-        elif data == AdminAction.GROUPS_LIST:
-            groups = self.repo.list_groups()
-            lines = [f"{g.chat_id} | @{g.username}" if g.username else f"{g.chat_id}" for g in groups]
-            msg = "Lista grup (max 50):\n" + "\n".join(lines[:50]) if lines else "Brak grup"
-            await q.edit_message_text(msg)
-            self._set_admin_context(context, awaiting=None)
+        handler = self._cb_routes.get(q.data)
+        if handler:
+            await handler(q, context)
+            self._sync_text_handler(q.from_user.id, context)
+
+    def _sync_text_handler(self, uid: int, context: ContextTypes.DEFAULT_TYPE):
+        """Dodaje/usuwa handler TEXT wraz z przejściem awaiting None <-> stan."""
+        if uid not in self._admin_ids:
+            return
+        if self._get_admin_context(context).awaiting is None:
+            self._awaiting_uids.discard(uid)
+        else:
+            self._awaiting_uids.add(uid)
+        if self._awaiting_uids and not self._text_handler_on:
+            self._app.add_handler(self._text_handler)
+            self._text_handler_on = True
+        elif not self._awaiting_uids and self._text_handler_on:
+            self._app.remove_handler(self._text_handler)
+            self._text_handler_on = False
+
+    async def _show(self, q, text: str, markup: InlineKeyboardMarkup):
+        """Edytuje panel; gdy tekst się nie zmienił, wysyła tylko klawiaturę (lub nic)."""
+        msg = q.message
+        if msg is not None and msg.text == text.strip():  # Telegram przycina białe znaki
+            if msg.reply_markup != markup:
+                await q.edit_message_reply_markup(reply_markup=markup)
+            return
+        await q.edit_message_text(text, reply_markup=markup)
+
+    # --- callbacki ---
+
+    async def _cb_set_info(self, q, context: ContextTypes.DEFAULT_TYPE):
+        await q.edit_message_text(
+            "Wyślij: @nazwa LUB @kanal LUB @grupa LUB [wiadomość] LUB CSV @nazwa,@kanal,@grupa,wiadomość"
+        )
+        self._get_admin_context(context).awaiting = "set_info"
+
+    async def _cb_set_contact(self, q, context: ContextTypes.DEFAULT_TYPE):
+        await q.edit_message_text("Wyślij nazwę kontaktu admina (np. @TwojNick)")
+        self._get_admin_context(context).awaiting = "set_contact"
+
+    async def _cb_time(self, q, context: ContextTypes.DEFAULT_TYPE):
+        await q.edit_message_text("Wyślij globalny interwał (minuty), np. 5")
+        self._get_admin_context(context).awaiting = "set_time_global"
+
+    async def _cb_ex_time(self, q, context: ContextTypes.DEFAULT_TYPE):
+        await self._show(
+            q, "Ex-Time:\n- Set Groups (wykluczenia)\n- Del Groups\n- Set Time (per grupa)", self._KB_EX_TIME
+        )
+        self._get_admin_context(context).awaiting = None
+
+    async def _cb_groups(self, q, context: ContextTypes.DEFAULT_TYPE):
+        await self._show(q, "Groups:\n- Add Groups\n- Del Groups\n- List", self._KB_GROUPS)
+        self._get_admin_context(context).awaiting = None
+
+    async def _cb_root(self, q, context: ContextTypes.DEFAULT_TYPE):
+        s = self._cached_settings()
+        await self._show(q, _render_root_text(s), self._root_keyboard())
+        self._get_admin_context(context).awaiting = None
+
+    async def _cb_ex_set_groups(self, q, context: ContextTypes.DEFAULT_TYPE):
+        await q.edit_message_text("Wklej listę group_id (każde w nowej linii) do wykluczenia z globalnego czasu:")
+        self._get_admin_context(context).awaiting = "ex_set_groups"
+
+    async def _cb_ex_del_groups(self, q, context: ContextTypes.DEFAULT_TYPE):
+        await q.edit_message_text("Wklej listę group_id do usunięcia z wykluczeń:")
+        self._get_admin_context(context).awaiting = "ex_del_groups"
+
+    async def _cb_ex_set_time(self, q, context: ContextTypes.DEFAULT_TYPE):
+        await q.edit_message_text("Podaj: group_id,minuty (np. -100123456789,3)")
+        self._get_admin_context(context).awaiting = "ex_set_time"
+
+    async def _cb_groups_add(self, q, context: ContextTypes.DEFAULT_TYPE):
+        await q.edit_message_text("Wklej listę group_id lub @username (po jednej pozycji w linii):")
+        self._get_admin_context(context).awaiting = "groups_add"
+
+    async def _cb_groups_del(self, q, context: ContextTypes.DEFAULT_TYPE):
+        await q.edit_message_text("Wklej listę group_id do usunięcia:")
+        self._get_admin_context(context).awaiting = "groups_del"
+
+    async def _cb_groups_list(self, q, context: ContextTypes.DEFAULT_TYPE):
+        groups = self.repo.list_groups()
+        lines = [f"{g.chat_id} | @{g.username}" if g.username else f"{g.chat_id}" for g in groups]
+        msg = "Lista grup (max 50):\n" + "\n".join(lines[:50]) if lines else "Brak grup"
+        await q.edit_message_text(msg)
+        self._get_admin_context(context).awaiting = None
 
     async def _on_text_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         if not update.effective_user or not update.message:
             return
         uid = update.effective_user.id
-        if uid not in self.settings.ADMIN_USERS and uid != self.settings.OWNER_ID:
+        if uid not in self._admin_ids:
             return
         adm_ctx = self._get_admin_context(context)
-        text = update.message.text.strip()
-
-        if adm_ctx.awaiting == "set_info":
-            parts = [p.strip() for p in text.split(",")]
-            s = self.repo.get_settings()
-            if len(parts) >= 4:
-                s.info_name, s.info_channel, s.info_group = parts[:3]
-                s.welcome_message = ",".join(parts[3:]).strip()
-                self.repo.set_settings(s)
-                await update.message.reply_text("Zapisano dane info (CSV) ✅")
-            else:
-                if text.startswith("@"):  # one of @nazwa/@kanal/@grupa
-                    if ("t.me" in text) or ("+" in text):
-                        if not (s.info_channel or ""):
-                            s.info_channel = text
-                        else:
-                            s.info_group = text
-                    else:
-                        s.info_name = text
-                else:
-                    s.welcome_message = text
-                self.repo.set_settings(s)
-                await update.message.reply_text("Zapisano (częściowa aktualizacja) ✅")
-            adm_ctx.awaiting = None
-        elif adm_ctx.awaiting == "set_contact":
-            s = self.repo.get_settings()
-            s.contact = text
-            self.repo.set_settings(s)
-            await update.message.reply_text("Zapisano kontakt admina ✅")
-            adm_ctx.awaiting = None
-        elif adm_ctx.awaiting == "set_time_global":
+        flow = self._flows.get(adm_ctx.awaiting)
+        if flow:
+            parse, apply, error_msg = flow
             try:
-                minutes = int(text)
-                if minutes < 1 or minutes > 1440:
-                    raise ValueError
-            except Exception:
-                await update.message.reply_text("Nieprawidłowa wartość. Podaj liczbę minut 1–1440.")
+                value = parse(update.message.text.strip())
+            except ValueError:
+                await update.message.reply_text(error_msg)
                 return
-            s = self.repo.get_settings()
-            s.global_interval_min = minutes
-            self.repo.set_settings(s)
-            await update.message.reply_text(f"Ustawiono globalny interwał: {minutes} min ✅")
-            adm_ctx.awaiting = None
-        elif adm_ctx.awaiting == "ex_set_groups":
-            items = [line.strip() for line in text.splitlines() if line.strip()]
-            changed = self.repo.set_excluded(items, True)
-            await update.message.reply_text(f"Dodano do wykluczeń: {changed} ✅")
+            await update.message.reply_text(await apply(value))
             adm_ctx.awaiting = None
-        elif adm_ctx.awaiting == "ex_del_groups":
-            items = [line.strip() for line in text.splitlines() if line.strip()]
-            changed = self.repo.set_excluded(items, False)
-            await update.message.reply_text(f"Usunięto z wykluczeń: {changed} ✅")
-            adm_ctx.awaiting = None
-        elif adm_ctx.awaiting == "ex_set_time":
-            try:
-                gid, mins = text.split(",", 1)
-                gid = gid.strip()
-                mins = int(mins.strip())
-                if mins < 1 or mins > 1440:
-                    raise ValueError
-            except Exception:
-                await update.message.reply_text("Format: group_id,minuty (1–1440)")
-                return
-            ok = self.repo.set_group_interval(gid, mins)
-            if ok:
-                await update.message.reply_text(f"Ustawiono {mins} min dla {gid} ✅")
+        self._sync_text_handler(uid, context)
+
+    # --- wejście tekstowe: akcje przepływów (zwracają treść odpowiedzi) ---
+
+    async def _do_set_info(self, text: str) -> str:
+        # CSV: pozycje trzech pierwszych przecinków, bez list pośrednich
+        i1 = text.find(",")
+        i2 = text.find(",", i1 + 1) if i1 >= 0 else -1
+        i3 = text.find(",", i2 + 1) if i2 >= 0 else -1
+        s = self._cached_settings()
+        if i3 >= 0:
+            s.info_name = text[:i1].strip()
+            s.info_channel = text[i1 + 1:i2].strip()
+            s.info_group = text[i2 + 1:i3].strip()
+            s.welcome_message = text[i3 + 1:].strip()
+            self._save_settings(s)
+            return "Zapisano dane info (CSV) ✅"
+        if text.startswith("@"):  # one of @nazwa/@kanal/@grupa
+            if ("t.me" in text) or ("+" in text):
+                if not (s.info_channel or ""):
+                    s.info_channel = text
+                else:
+                    s.info_group = text
             else:
-                await update.message.reply_text(f"Nie znaleziono grupy: {gid}")
-            adm_ctx.awaiting = None
-        elif adm_ctx.awaiting == "groups_add":
-            items = [line.strip() for line in text.splitlines() if line.strip()]
-            added = self.repo.add_groups(items)
-            await update.message.reply_text(f"Dodano grup: {added} ✅")
-            adm_ctx.awaiting = None
-        elif adm_ctx.awaiting == "groups_del":
-            items = [line.strip() for line in text.splitlines() if line.strip()]
-            deleted = self.repo.del_groups(items)
-            await update.message.reply_text(f"Usunięto grup: {deleted} ✅")
-            adm_ctx.awaiting = None
+                s.info_name = text
+        else:
+            s.welcome_message = text
+        self._save_settings(s)
+        return "Zapisano (częściowa aktualizacja) ✅"
+
+    async def _do_set_contact(self, text: str) -> str:
+        s = self._cached_settings()
+        s.contact = text
+        self._save_settings(s)
+        return "Zapisano kontakt admina ✅"
+
+    async def _do_set_time_global(self, minutes: int) -> str:
+        s = self._cached_settings()
+        s.global_interval_min = minutes
+        self._save_settings(s)
+        return f"Ustawiono globalny interwał: {minutes} min ✅"
+
+    async def _do_ex_set_groups(self, items: List[str]) -> str:
+        changed = await self._persist(self.repo.set_excluded, items, True)
+        return f"Dodano do wykluczeń: {changed} ✅"
+
+    async def _do_ex_del_groups(self, items: List[str]) -> str:
+        changed = await self._persist(self.repo.set_excluded, items, False)
+        return f"Usunięto z wykluczeń: {changed} ✅"
+
+    async def _do_ex_set_time(self, value: Tuple[str, int]) -> str:
+        gid, mins = value
+        if await self._persist(self.repo.set_group_interval, gid, mins):
+            return f"Ustawiono {mins} min dla {gid} ✅"
+        return f"Nie znaleziono grupy: {gid}"
+
+    async def _do_groups_add(self, items: List[str]) -> str:
+        added = await self._persist(self.repo.add_groups, items)
+        return f"Dodano grup: {added} ✅"
+
+    async def _do_groups_del(self, items: List[str]) -> str:
+        deleted = await self._persist(self.repo.del_groups, items)
+        return f"Usunięto grup: {deleted} ✅"
 
     def _get_admin_context(self, context: ContextTypes.DEFAULT_TYPE) -> AdminContext:
-        ctx = context.bot_data.get("admin_ctx")
-        if not ctx:
-            ctx = AdminContext()
-            context.bot_data["admin_ctx"] = ctx
-        return ctx
-
-    def _set_admin_context(self, context: ContextTypes.DEFAULT_TYPE, *, awaiting: Optional[str]):
-        ctx = self._get_admin_context(context)
-        ctx.awaiting = awaiting
+        # user_data jest per-użytkownik - admini nie nadpisują sobie stanu
+        return context.user_data.setdefault("admin_ctx", AdminContext())
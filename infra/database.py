@@ -2,53 +2,141 @@
 """
 Database Manager - dual-mode (sync/async) with safe sync initialize (no test query)
 """
+import asyncio
 import logging
-from typing import Optional, AsyncGenerator
+from typing import Any, AsyncContextManager, Awaitable, Callable, Optional, AsyncGenerator, TypeVar
 from contextlib import contextmanager, asynccontextmanager
+from functools import partial
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.engine import Engine
 from sqlalchemy import text as sql_text
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+
+T = TypeVar("T")
+
+_SELECT_1 = sql_text("SELECT 1")
+
+_SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
+
+def _sqlite_on_connect(dbapi_connection, connection_record):
+    # WAL: czytelnicy nie czekają na zapis; PRAGMY per-połączenie ustawiane przy każdym connect
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in _SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+class _AsyncLikeSession:
+    """Minimal async-compatible wrapper around a sync session."""
+
+    def __init__(self, sync_session):
+        self._s = sync_session
+
+    async def execute(self, *args, **kwargs):
+        return self._s.execute(*args, **kwargs)
+
+    async def commit(self):
+        self._s.commit()
+
+    async def rollback(self):
+        self._s.rollback()
+
+    async def close(self):
+        self._s.close()
 
 
 class DatabaseManager:
-    def __init__(self, database_url: str):
+    def __init__(self, database_url: str, pool_size: int = 10, max_overflow: int = 20,
+                 pool_recycle: int = 1800, pool_pre_ping: bool = True):
         self.database_url = database_url
+        # Parametry puli dla serwerowych baz (PostgreSQL); SQLite ma własną, małą pulę
+        self._pool_opts = dict(pool_size=pool_size, max_overflow=max_overflow,
+                               pool_recycle=pool_recycle, pool_pre_ping=pool_pre_ping)
         self.logger = logging.getLogger(__name__)
         self.sync_engine: Optional[Engine] = None
         self.sync_session_factory: Optional[sessionmaker] = None
         self.async_engine: Optional[AsyncEngine] = None
         self.async_session_factory: Optional[async_sessionmaker] = None
+        # Konstruktory sesji z kwargs związanymi raz (hot path omija merge kwargs w sessionmaker.__call__)
+        self._mk_async: Optional[Callable[[], AsyncSession]] = None
+        self._mk_sync: Optional[Callable[[], Session]] = None
         self._mode = "unknown"
+        self._use_async = False
+        self._ready = asyncio.Event()
+        self._check_task: Optional[asyncio.Task] = None
+        self._get_session_impl = self._get_uninitialized
 
     async def initialize(self):
         if self.database_url.startswith(("sqlite+aiosqlite", "postgresql+asyncpg")):
             # Async mode
             self._mode = "async"
-            self.async_engine = create_async_engine(self.database_url, echo=False)
+            if self.database_url.startswith("sqlite"):
+                # Mała pula zamiast jednego połączenia - równoległe odczyty w WAL
+                self.async_engine = create_async_engine(
+                    self.database_url, echo=False,
+                    poolclass=AsyncAdaptedQueuePool, pool_size=5, max_overflow=10,
+                )
+                event.listen(self.async_engine.sync_engine, "connect", _sqlite_on_connect)
+            else:
+                self.async_engine = create_async_engine(
+                    self.database_url, echo=False,
+                    poolclass=AsyncAdaptedQueuePool, **self._pool_opts,
+                )
             self.async_session_factory = async_sessionmaker(self.async_engine, class_=AsyncSession, expire_on_commit=False)
-            # Light async connectivity check
-            try:
-                async with self.async_engine.begin() as conn:
-                    await conn.execute(sql_text("SELECT 1"))
-            except Exception as e:
-                self.logger.warning(f"Async DB connectivity check failed: {e}")
+            self._mk_async = partial(AsyncSession, bind=self.async_engine, expire_on_commit=False)
+            self._use_async = True
+            self._get_session_impl = self._get_async_session
+            # Light async connectivity check - in background, startup does not wait for it
+            self._check_task = asyncio.create_task(self._test_connection())
             self.logger.info("Database initialized (async mode)")
         else:
             # Sync mode (no test query to avoid any greenlet paths on Windows)
             self._mode = "sync"
-            self.sync_engine = create_engine(self.database_url, echo=False, future=True)
+            if self.database_url.startswith("sqlite"):
+                self.sync_engine = create_engine(self.database_url, echo=False, future=True)
+                event.listen(self.sync_engine, "connect", _sqlite_on_connect)
+            else:
+                self.sync_engine = create_engine(
+                    self.database_url, echo=False, future=True,
+                    poolclass=QueuePool, **self._pool_opts,
+                )
             self.sync_session_factory = sessionmaker(self.sync_engine, expire_on_commit=False)
+            self._mk_sync = partial(Session, bind=self.sync_engine, expire_on_commit=False)
+            self._get_session_impl = self._get_sync_shim
+            self._ready.set()
             self.logger.info("Database initialized (sync mode)")
 
+    async def _test_connection(self):
+        try:
+            async with self.async_engine.begin() as conn:
+                await conn.execute(_SELECT_1)
+        except Exception as e:
+            self.logger.warning("Async DB connectivity check failed: %s", e)
+        finally:
+            self._ready.set()
+
+    async def wait_ready(self):
+        """Await the background connectivity check (handlers that need the DB)."""
+        await self._ready.wait()
+
     @contextmanager
     def get_sync_session(self):
-        if not self.sync_session_factory:
+        if not self._mk_sync:
             raise RuntimeError("Sync session factory not initialized")
-        session = self.sync_session_factory()
+        session = self._mk_sync()
         try:
             yield session
             session.commit()
@@ -58,41 +146,59 @@ class DatabaseManager:
         finally:
             session.close()
 
+    @property
+    def get_session(self) -> Callable[[], AsyncContextManager[AsyncSession]]:
+        """Session context manager chosen once in initialize() - no per-call mode branch."""
+        return self._get_session_impl
+
     @asynccontextmanager
-    async def get_session(self) -> AsyncGenerator[AsyncSession, None]:
-        if self.async_session_factory:
-            async with self.async_session_factory() as session:
-                try:
-                    yield session
-                    await session.commit()
-                except Exception:
-                    await session.rollback()
-                    raise
-        elif self.sync_session_factory:
-            # Provide a minimal async-compatible wrapper around sync session
-            class _AsyncLikeSession:
-                def __init__(self, sync_session):
-                    self._s = sync_session
-                async def execute(self, *args, **kwargs):
-                    return self._s.execute(*args, **kwargs)
-                async def commit(self):
-                    self._s.commit()
-                async def rollback(self):
-                    self._s.rollback()
-                async def close(self):
-                    self._s.close()
-            with self.get_sync_session() as s:
-                yield _AsyncLikeSession(s)  # type: ignore
-        else:
-            raise RuntimeError("Database not initialized")
+    async def _get_async_session(self) -> AsyncGenerator[AsyncSession, None]:
+        async with self._mk_async() as session:
+            try:
+                yield session
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+
+    @asynccontextmanager
+    async def _get_sync_shim(self) -> AsyncGenerator[AsyncSession, None]:
+        # Sync fallback (dev): calls block the event loop - keep them short
+        with self.get_sync_session() as s:
+            yield _AsyncLikeSession(s)  # type: ignore
+
+    @asynccontextmanager
+    async def _get_uninitialized(self) -> AsyncGenerator[AsyncSession, None]:
+        raise RuntimeError("Database not initialized")
+        yield
+
+    async def run_in_session(self, fn: Callable[[Any], Awaitable[T]]) -> T:
+        """Run fn(session) and commit, or roll back on error - no contextmanager generator."""
+        if not self._use_async:
+            async with self.get_session() as s:
+                return await fn(s)
+        async with self._mk_async() as session:
+            try:
+                result = await fn(session)
+                await session.commit()
+                return result
+            except Exception:
+                await session.rollback()
+                raise
 
     async def close(self):
+        if self._check_task and not self._check_task.done():
+            self._check_task.cancel()
         if self.async_engine:
             await self.async_engine.dispose()
         if self.sync_engine:
             self.sync_engine.dispose()
         self.logger.info("Database closed")
 
+    def pool_status(self) -> str:
+        engine = self.async_engine.sync_engine if self.async_engine else self.sync_engine
+        return engine.pool.status() if engine else "not initialized"
+
     @property
     def mode(self) -> str:
         return self._mode
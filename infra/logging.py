@@ -1,20 +1,49 @@
 # -*- coding: utf-8 -*-
 """
-Logging Infrastructure - simplified to avoid structlog processor mismatch
+Logging Infrastructure - stdlib only (no structlog processor chain on the hot path)
 """
 import logging
 import logging.handlers
+import queue
 import sys
+import time
 from pathlib import Path
 from typing import Optional
 
 from config.settings import LogLevel
 
 
+class _CachedTimeFormatter(logging.Formatter):
+    """Formatter, który formatuje znacznik czasu raz na sekundę zamiast dla każdego rekordu."""
+
+    def __init__(self, fmt: str, datefmt: str):
+        super().__init__(fmt, datefmt)
+        self._last_sec = -1
+        self._last_str = ''
+
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        sec = int(record.created)
+        if sec != self._last_sec:
+            self._last_str = time.strftime(self.datefmt, self.converter(sec))
+            self._last_sec = sec
+        return self._last_str
+
+
 def setup_logging(log_level: LogLevel = LogLevel.INFO, log_file: str = 'logs/bot.log') -> logging.Logger:
+    # Idempotentne: przy działającym listenerze nie budujemy drugiego zestawu handlerów/wątku
+    logger = logging.getLogger('telegram_bot')
+    if getattr(logger, 'listener', None) is not None:
+        return logger
+
     # Ensure log directory
     Path(log_file).parent.mkdir(parents=True, exist_ok=True)
 
+    # Bez introspekcji ramek/wątków/procesów przy tworzeniu każdego rekordu (format ich nie używa)
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+    logging._srcfile = None
+
     # Configure root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(getattr(logging, log_level.value))
@@ -23,16 +52,44 @@ def setup_logging(log_level: LogLevel = LogLevel.INFO, log_file: str = 'logs/bot
     for h in root_logger.handlers[:]:
         root_logger.removeHandler(h)
 
+    level = getattr(logging, log_level.value)
+    fmt = _CachedTimeFormatter('%(asctime)s %(levelname)s [%(name)s] %(message)s', '%Y-%m-%d %H:%M:%S')
+
     # Console handler
     ch = logging.StreamHandler(sys.stdout)
-    ch.setLevel(getattr(logging, log_level.value))
-    ch.setFormatter(logging.Formatter('%(asctime)s %(levelname)s [%(name)s] %(message)s', '%Y-%m-%d %H:%M:%S'))
-    root_logger.addHandler(ch)
+    ch.setLevel(level)
+    ch.setFormatter(fmt)
 
-    # Rotating file handler
+    # Rotating file handler, zapisy buforowane (flush co 1024 rekordy lub od razu przy ERROR)
     fh = logging.handlers.RotatingFileHandler(log_file, maxBytes=10*1024*1024, backupCount=5, encoding='utf-8')
-    fh.setLevel(getattr(logging, log_level.value))
-    fh.setFormatter(logging.Formatter('%(asctime)s %(levelname)s [%(name)s] %(message)s', '%Y-%m-%d %H:%M:%S'))
-    root_logger.addHandler(fh)
+    fh.setLevel(level)
+    fh.setFormatter(fmt)
+    mem = logging.handlers.MemoryHandler(1024, flushLevel=logging.ERROR, target=fh)
+    mem.setLevel(level)
+
+    # I/O poza pętlą zdarzeń: rekordy trafiają do kolejki, zapisuje je wątek listenera
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    root_logger.addHandler(logging.handlers.QueueHandler(q))
+    listener = logging.handlers.QueueListener(q, mem, ch, respect_handler_level=True)
+    listener.start()
+
+    logger.listener = listener  # zatrzymywany w TelegramBotApplication.shutdown
+    return logger
 
-    return logging.getLogger('telegram_bot')
+
+def stop_logging(logger: logging.Logger) -> None:
+    """Zatrzymuje listener kolejki, wypycha zbuforowane rekordy i podpina handlery bezpośrednio do roota."""
+    listener: Optional[logging.handlers.QueueListener] = getattr(logger, 'listener', None)
+    if listener is None:
+        return
+    # Rekordy po zatrzymaniu (np. teardown pętli w main._run) idą od razu do handlerów,
+    # a nie do kolejki, której nikt już nie opróżnia
+    root_logger = logging.getLogger()
+    for h in root_logger.handlers[:]:
+        if isinstance(h, logging.handlers.QueueHandler) and h.queue is listener.queue:
+            root_logger.removeHandler(h)
+    listener.stop()
+    for h in listener.handlers:
+        h.flush()
+        root_logger.addHandler(h)
+    logger.listener = None
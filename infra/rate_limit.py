@@ -1,12 +1,40 @@
 # -*- coding: utf-8 -*-
 """
-Simple rate limiter stub that allows all requests.
-Replace later with token bucket implementation.
+Per-key token bucket rate limiter.
+State per key is a single int: (last_refill_ns << 24) | tokens.
 """
-import asyncio
+import time
+from typing import Any, Dict
+
+_TOKENS_BITS = 24
+_TOKENS_MASK = (1 << _TOKENS_BITS) - 1
+
 
 class RateLimiter:
-    def __init__(self, *args, **kwargs):
-        pass
-    async def allow_request(self, key) -> bool:
-        return True
+    def __init__(self, rps: float = 20.0, burst: int = 40):
+        if rps <= 0 or not 0 < burst <= _TOKENS_MASK:
+            raise ValueError("rps must be > 0 and burst in 1..2^24-1")
+        self._ns_per_token = max(1, int(1_000_000_000 / rps))
+        self._burst = burst
+        self._state: Dict[Any, int] = {}
+
+    def allow_request(self, key) -> bool:
+        """Synchronous - no coroutine suspension on the hot path."""
+        now = time.monotonic_ns()
+        st = self._state.get(key, 0)  # nowy klucz: last=0 -> pełny kubełek
+        last = st >> _TOKENS_BITS
+        tokens = st & _TOKENS_MASK
+        added = (now - last) // self._ns_per_token
+        if added:
+            tokens = min(self._burst, tokens + added)
+            # Przy pełnym kubełku start od teraz; inaczej zachowaj niewykorzystany ułamek tokenu
+            last = now if tokens == self._burst else last + added * self._ns_per_token
+        if tokens:
+            self._state[key] = (last << _TOKENS_BITS) | (tokens - 1)
+            return True
+        self._state[key] = (last << _TOKENS_BITS)
+        return False
+
+    async def allow_request_async(self, key) -> bool:
+        """For callers that still await; prefer allow_request."""
+        return self.allow_request(key)
@@ -4,6 +4,7 @@ Simple in-memory repository with JSON persistence for dev (sync path)
 Switch to SQLAlchemy later.
 """
 import json
+import os
 from pathlib import Path
 from typing import Dict, List, Optional
 from datetime import datetime, timezone
@@ -11,16 +12,65 @@ from datetime import datetime, timezone
 from domain.models import BotSettings, Group
 
 STORE = Path("data/repo_store.json")
+WAL = Path("data/repo_store.wal")
+
+_FSYNC_EVERY = 64       # fsync WAL co tyle operacji
+_COMPACT_EVERY = 1000   # snapshot + obcięcie WAL co tyle operacji
+
+_dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
 
 
 def _now():
     return datetime.now(timezone.utc).isoformat()
 
 
+def _ts(value: Optional[str]) -> datetime:
+    return datetime.fromisoformat(value) if value else datetime.now(timezone.utc)
+
+
+def _settings_from(s: Dict) -> BotSettings:
+    return BotSettings(
+        info_name=s.get("info_name"),
+        info_channel=s.get("info_channel"),
+        info_group=s.get("info_group"),
+        welcome_message=s.get("welcome_message"),
+        contact=s.get("contact"),
+        global_interval_min=s.get("global_interval_min", 5),
+        updated_at=_ts(s.get("updated_at")),
+    )
+
+
+def _group_from(gid: str, g: Dict) -> Group:
+    return Group(
+        chat_id=gid,
+        username=g.get("username"),
+        name=g.get("name"),
+        custom_interval_min=g.get("custom_interval_min"),
+        excluded_from_global=g.get("excluded_from_global", False),
+        created_at=_ts(g.get("created_at")),
+        updated_at=_ts(g.get("updated_at")),
+    )
+
+
 class Repo:
+    """
+    Stan trzymany w pamięci; trwałość = snapshot JSON + append-only WAL.
+    Każda mutacja dopisuje do WAL jedną linię [op, klucz, wartość] zamiast
+    przepisywać cały plik. Snapshot jest odtwarzany co _COMPACT_EVERY operacji i w close().
+    """
+
     def __init__(self):
         self._data = {"settings": {}, "groups": {}}
+        self._ops = 0
         self._load()
+        # Zmaterializowane encje; aktualizowane razem z self._data przy każdej mutacji
+        self._settings_cache = _settings_from(self._data.get("settings") or {})
+        self._groups_cache: Dict[str, Group] = {
+            gid: _group_from(gid, g) for gid, g in self._data.get("groups", {}).items()
+        }
+        WAL.parent.mkdir(parents=True, exist_ok=True)
+        self._wal = open(WAL, "ab", buffering=64 * 1024)
+        self._unsynced = 0
 
     def _load(self):
         if STORE.exists():
@@ -28,22 +78,70 @@ class Repo:
                 self._data = json.loads(STORE.read_text(encoding="utf-8"))
             except Exception:
                 pass
+        if WAL.exists():
+            self._replay()
 
-    def _save(self):
+    def _replay(self):
+        groups = self._data.setdefault("groups", {})
+        good = 0  # offset końca ostatniego poprawnego rekordu
+        with open(WAL, "r+b") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # urwany ostatni zapis po awarii
+                try:
+                    op, key, value = json.loads(line)
+                except ValueError:
+                    break
+                if op == "put":
+                    groups[key] = value
+                elif op == "del":
+                    groups.pop(key, None)
+                elif op == "settings":
+                    self._data["settings"] = value
+                self._ops += 1
+                good += len(line)
+            # Odcięcie uszkodzonego ogona - inaczej kolejny append skleiłby się z nim w jedną linię
+            f.truncate(good)
+
+    def _save(self, ops: List[list]):
+        """Dopisuje operacje do WAL jednym write()."""
+        buf = bytearray()
+        for op in ops:
+            buf += _dumps(op).encode("utf-8")
+            buf += b"\n"
+        self._wal.write(buf)
+        self._wal.flush()
+        self._ops += len(ops)
+        self._unsynced += len(ops)
+        if self._ops >= _COMPACT_EVERY:
+            self.compact()
+        elif self._unsynced >= _FSYNC_EVERY:
+            os.fsync(self._wal.fileno())
+            self._unsynced = 0
+
+    def compact(self):
+        """Zapisuje pełny snapshot (atomowo przez os.replace) i czyści WAL."""
         STORE.parent.mkdir(parents=True, exist_ok=True)
-        STORE.write_text(json.dumps(self._data, ensure_ascii=False, indent=2), encoding="utf-8")
+        tmp = STORE.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(_dumps(self._data))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, STORE)
+        self._wal.truncate(0)
+        self._wal.flush()
+        self._ops = 0
+        self._unsynced = 0
+
+    def close(self):
+        if self._wal.closed:
+            return
+        self.compact()
+        self._wal.close()
 
     # Settings
     def get_settings(self) -> BotSettings:
-        s = self._data.get("settings") or {}
-        return BotSettings(
-            info_name=s.get("info_name"),
-            info_channel=s.get("info_channel"),
-            info_group=s.get("info_group"),
-            welcome_message=s.get("welcome_message"),
-            contact=s.get("contact"),
-            global_interval_min=s.get("global_interval_min", 5),
-        )
+        return self._settings_cache
 
     def set_settings(self, s: BotSettings):
         self._data["settings"] = {
@@ -55,68 +153,69 @@ class Repo:
             "global_interval_min": s.global_interval_min,
             "updated_at": _now(),
         }
-        self._save()
+        self._settings_cache = _settings_from(self._data["settings"])
+        self._save([["settings", None, self._data["settings"]]])
 
     # Groups
     def list_groups(self) -> List[Group]:
-        out = []
-        for gid, g in self._data.get("groups", {}).items():
-            out.append(Group(
-                chat_id=gid,
-                username=g.get("username"),
-                name=g.get("name"),
-                custom_interval_min=g.get("custom_interval_min"),
-                excluded_from_global=g.get("excluded_from_global", False),
-            ))
-        return out
+        return list(self._groups_cache.values())
 
+    # Bulk operations: whole list mutated in memory, then ONE write
     def add_groups(self, items: List[str]) -> int:
-        count = 0
-        self._data.setdefault("groups", {})
+        ops = []
+        groups = self._data.setdefault("groups", {})
+        ts = _now()
         for it in items:
             gid = it.strip()
             if not gid:
                 continue
             # simple dedup
-            if gid in self._data["groups"]:
+            if gid in groups:
                 continue
-            self._data["groups"][gid] = {
+            groups[gid] = {
                 "username": gid[1:] if gid.startswith("@") else None,
                 "name": None,
                 "custom_interval_min": None,
                 "excluded_from_global": False,
-                "created_at": _now(),
-                "updated_at": _now(),
+                "created_at": ts,
+                "updated_at": ts,
             }
-            count += 1
-        if count:
-            self._save()
-        return count
+            self._groups_cache[gid] = _group_from(gid, groups[gid])
+            ops.append(["put", gid, groups[gid]])
+        if ops:
+            self._save(ops)
+        return len(ops)
 
     def del_groups(self, items: List[str]) -> int:
-        count = 0
-        if "groups" not in self._data:
+        ops = []
+        groups = self._data.get("groups")
+        if not groups:
             return 0
         for it in items:
-            if it in self._data["groups"]:
-                del self._data["groups"][it]
-                count += 1
-        if count:
-            self._save()
-        return count
+            if groups.pop(it, None) is not None:
+                self._groups_cache.pop(it, None)
+                ops.append(["del", it, None])
+        if ops:
+            self._save(ops)
+        return len(ops)
 
     def set_excluded(self, items: List[str], excluded: bool) -> int:
-        count = 0
+        ops = []
+        groups = self._data.get("groups", {})
+        ts = _now()
         for it in items:
-            g = self._data.get("groups", {}).get(it)
+            g = groups.get(it)
             if not g:
                 continue
             g["excluded_from_global"] = excluded
-            g["updated_at"] = _now()
-            count += 1
-        if count:
-            self._save()
-        return count
+            g["updated_at"] = ts
+            cached = self._groups_cache[it]
+            cached.excluded_from_global = excluded
+            cached.updated_at = _ts(ts)
+            ops.append(["put", it, g])
+        if ops:
+            self._save(ops)
+        return len(ops)
 
     def set_group_interval(self, gid: str, minutes: int) -> bool:
         g = self._data.get("groups", {}).get(gid)
@@ -124,5 +223,8 @@ class Repo:
             return False
         g["custom_interval_min"] = minutes
         g["updated_at"] = _now()
-        self._save()
+        cached = self._groups_cache[gid]
+        cached.custom_interval_min = minutes
+        cached.updated_at = _ts(g["updated_at"])
+        self._save([["put", gid, g]])
         return True
@@ -3,7 +3,10 @@
 Runner with Windows-friendly Ctrl+C and keyboard 'q' fallback to stop.
 """
 import asyncio
+import functools
+import inspect
 import logging
+import os
 import sys
 import signal
 from typing import Callable, Awaitable, List
@@ -11,63 +14,96 @@ from typing import Callable, Awaitable, List
 log = logging.getLogger(__name__)
 
 class _Closer:
-    def __init__(self):
-        self._event = asyncio.Event()
-        self._cleanups: List[Callable[[], Awaitable[None]] | Callable[[], None]] = []
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        # Jedna future rozwiązywana przy zamknięciu (tworzona na działającej pętli)
+        self._done = loop.create_future()
+        self._async: List[Callable[[], Awaitable[None]]] = []
+        self._sync: List[Callable[[], None]] = []
 
-    def install_signals(self, loop: asyncio.AbstractEventLoop):
+    def install_signals(self):
+        sigs = (signal.SIGINT, signal.SIGTERM)
         try:
-            loop.add_signal_handler(signal.SIGINT, self.trigger)
-            loop.add_signal_handler(signal.SIGTERM, self.trigger)
+            # Sygnał dostarczany przez wakeup fd pętli - obsługa jako zwykłe zdarzenie pętli
+            for sig in sigs:
+                self._loop.add_signal_handler(sig, functools.partial(self._on_signal, sig))
         except NotImplementedError:
-            def _h(sig, frame):
-                self.trigger()
-            signal.signal(signal.SIGINT, _h)
-            try:
-                signal.signal(signal.SIGTERM, _h)
-            except Exception:
-                pass
+            # Windows: brak add_signal_handler - jeden handler (metoda) dla wszystkich sygnałów
+            handler = self._signal_handler
+            for sig in sigs:
+                try:
+                    signal.signal(sig, handler)
+                except Exception:
+                    pass
+
+    def _signal_handler(self, sig, *_):
+        # Przekazanie do pętli (call_soon_threadsafe ją budzi)
+        self._loop.call_soon_threadsafe(self._on_signal, sig)
+
+    def _on_signal(self, sig: int):
+        log.info("Received %s", signal.Signals(sig).name)
+        self.trigger()
 
     def register(self, fn):
-        self._cleanups.append(fn)
+        (self._async if inspect.iscoroutinefunction(fn) else self._sync).append(fn)
+
+    def is_closing(self) -> bool:
+        return self._done.done()
 
     def trigger(self):
-        if not self._event.is_set():
+        if not self._done.done():
             log.info("Shutdown requested")
-            self._event.set()
+            self._done.set_result(None)
 
-    async def wait(self):
-        await self._event.wait()
+    @property
+    def closed(self) -> asyncio.Future:
+        return self._done
 
     async def cleanup(self):
-        for fn in self._cleanups:
+        results = await asyncio.gather(*(fn() for fn in self._async), return_exceptions=True)
+        for res in results:
+            if isinstance(res, Exception):
+                log.error("Cleanup error: %s", res)
+        for fn in self._sync:
             try:
-                res = fn()
-                if asyncio.iscoroutine(res):
-                    await res
+                fn()
             except Exception as e:
-                log.error(f"Cleanup error: {e}")
+                log.error("Cleanup error: %s", e)
 
 async def _keyboard_watcher(closer: _Closer):
-    """Fallback: press 'q' + Enter to quit."""
-    loop = asyncio.get_event_loop()
-    def _readline():
-        return sys.stdin.readline()
+    """Fallback: press 'q' (+ Enter on POSIX) to quit. Non-blocking poll - no executor thread."""
     try:
-        while not closer._event.is_set():
-            line = await loop.run_in_executor(None, _readline)
-            if not line:
-                continue
-            if line.strip().lower() == 'q':
-                closer.trigger()
-                break
+        if sys.platform == "win32":
+            import msvcrt
+            while not closer.is_closing():
+                if msvcrt.kbhit() and msvcrt.getwch().lower() == 'q':
+                    closer.trigger()
+                    break
+                await asyncio.sleep(0.1)
+        else:
+            import select
+            # Surowy fd zamiast sys.stdin: po select() os.read nie blokuje (readline mógłby
+            # czekać na resztę linii), a bufor TextIOWrapper nie ukrywa danych przed select()
+            fd = sys.stdin.fileno()
+            pending = b""
+            while not closer.is_closing():
+                if select.select([fd], [], [], 0)[0]:
+                    chunk = os.read(fd, 1024)
+                    if not chunk:
+                        break  # EOF (stdin zamknięte / nie-TTY) - nic do obserwowania
+                    *lines, pending = (pending + chunk).split(b"\n")
+                    pending = pending[-64:]
+                    if any(line.strip().lower() == b'q' for line in lines):
+                        closer.trigger()
+                        break
+                await asyncio.sleep(0.1)
     except Exception:
         pass
 
 async def run_with_shutdown(main_coro: Callable[[], Awaitable[None]], cleanup_coros: List[Callable[[], Awaitable[None]] | Callable[[], None]] | None = None):
-    closer = _Closer()
-    loop = asyncio.get_event_loop()
-    closer.install_signals(loop)
+    loop = asyncio.get_running_loop()
+    closer = _Closer(loop)
+    closer.install_signals()
     if cleanup_coros:
         for fn in cleanup_coros:
             closer.register(fn)
@@ -75,16 +111,23 @@ async def run_with_shutdown(main_coro: Callable[[], Awaitable[None]], cleanup_co
     task = asyncio.create_task(main_coro())
     kb = asyncio.create_task(_keyboard_watcher(closer))
 
-    await closer.wait()
+    # Budzi nas sygnał zamknięcia albo awaria głównego zadania - co pierwsze
+    done, _ = await asyncio.wait({task, closer.closed}, return_when=asyncio.FIRST_COMPLETED)
+    failure = None
+    if task in done and not closer.is_closing():
+        if task.cancelled():
+            log.error("Main task was cancelled")
+        elif task.exception() is not None:
+            failure = task.exception()
+            log.error("Main task failed: %s", failure, exc_info=failure)
+        else:
+            # Zadanie tylko uruchomiło bota (polling/webhook działa w tle) - czekamy na zamknięcie
+            await closer.closed
     log.info("Stopping... running cleanup")
-    try:
-        task.cancel()
-        with asyncio.CancelledError:
-            pass
-    except Exception:
-        pass
+    task.cancel()
+    kb.cancel()
+    # Oba zadania faktycznie dokończone (anulowanie dostarczone) przed sprzątaniem
+    await asyncio.gather(task, kb, return_exceptions=True)
     await closer.cleanup()
-    try:
-        kb.cancel()
-    except Exception:
-        pass
+    if failure is not None:
+        raise failure
@@ -3,10 +3,12 @@
 Scheduler Manager - DST-safe, retry with jitter (minimal runnable stub)
 """
 import asyncio
+import heapq
 import logging
+import time
+from datetime import datetime, timezone
 from dataclasses import dataclass
-from typing import Callable, Dict, Optional
-from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
 from tenacity import retry, stop_after_attempt, wait_random_exponential
 
@@ -15,16 +17,21 @@ class _Job:
     name: str
     interval_seconds: int
     coro: Callable
-    task: Optional[asyncio.Task] = None
-    next_run: Optional[datetime] = None
+    next_run: Optional[float] = None  # time.monotonic() seconds
 
 class SchedulerManager:
     def __init__(self, settings):
         self.settings = settings
         self.logger = logging.getLogger(__name__)
         self._jobs: Dict[str, _Job] = {}
+        # Kopiec (next_run, name) - runner śpi do najbliższego terminu zamiast odpytywać co sekundę
+        self._heap: List[Tuple[float, str]] = []
+        self._wake = asyncio.Event()
         self._running = False
         self._loop_task: Optional[asyncio.Task] = None
+        # Ograniczona równoległość zadań (ochrona przed burstem do Telegram API)
+        self._sem = asyncio.Semaphore(settings.MAX_CONCURRENT_JOBS)
+        self._batches: Set[asyncio.Task] = set()
 
     async def initialize(self):
         return
@@ -40,23 +47,58 @@ class SchedulerManager:
         self._running = False
         if self._loop_task:
             self._loop_task.cancel()
-        for job in self._jobs.values():
-            if job.task:
-                job.task.cancel()
+        for task in self._batches:
+            task.cancel()
         self.logger.info("Scheduler stopped")
 
     def add_interval_job(self, name: str, coro: Callable, minutes: int):
         seconds = max(60, minutes * 60)
-        self._jobs[name] = _Job(name=name, interval_seconds=seconds, coro=coro, next_run=self._now())
+        next_run = time.monotonic()
+        self._jobs[name] = _Job(name=name, interval_seconds=seconds, coro=coro, next_run=next_run)
+        heapq.heappush(self._heap, (next_run, name))
+        self._wake.set()
 
     async def _runner(self):
         while self._running:
-            now = self._now()
-            for job in list(self._jobs.values()):
-                if job.next_run and now >= job.next_run:
-                    job.next_run = now + timedelta(seconds=job.interval_seconds)
-                    job.task = asyncio.create_task(self._execute(job))
-            await asyncio.sleep(1)
+            if not self._heap:
+                await self._wake.wait()
+                self._wake.clear()
+                continue
+            due, name = self._heap[0]
+            delay = due - time.monotonic()
+            if delay > 0:
+                # Budzi nas termin albo nowe zadanie (add_interval_job)
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except TimeoutError:
+                    pass
+                self._wake.clear()
+                continue
+            # Wszystkie zadania, których termin minął, uruchamiane jedną partią
+            now = time.monotonic()
+            batch: List[_Job] = []
+            while self._heap and self._heap[0][0] <= now:
+                due, name = heapq.heappop(self._heap)
+                job = self._jobs.get(name)
+                if job is None or job.next_run != due:
+                    continue  # wpis nieaktualny (zadanie podmienione)
+                job.next_run = now + job.interval_seconds
+                heapq.heappush(self._heap, (job.next_run, name))
+                batch.append(job)
+            if batch:
+                task = asyncio.create_task(self._run_all(batch))
+                self._batches.add(task)
+                task.add_done_callback(self._batches.discard)
+
+    async def _run_all(self, batch: List[_Job]):
+        results = await asyncio.gather(*(self._guarded(job) for job in batch), return_exceptions=True)
+        for job, res in zip(batch, results):
+            if isinstance(res, Exception):
+                self.logger.error("Job %s gave up after retries: %s", job.name, res)
+
+    async def _guarded(self, job: _Job):
+        async with self._sem:
+            await self._execute(job)
 
     @retry(stop=stop_after_attempt(5), wait=wait_random_exponential(multiplier=1, max=60))
     async def _execute(self, job: _Job):
@@ -65,8 +107,9 @@ class SchedulerManager:
         except asyncio.CancelledError:
             raise
         except Exception as e:
-            self.logger.error(f"Job {job.name} failed: {e}")
+            self.logger.error("Job %s failed: %s", job.name, e)
             raise
 
     def _now(self) -> datetime:
+        # Tylko dla znaczników czasu na zewnątrz (audyt/logi); terminy liczone są na time.monotonic()
         return datetime.now(timezone.utc)
@@ -3,6 +3,7 @@
 Graceful shutdown handling for Windows (Ctrl+C) with PTB Application.
 """
 import asyncio
+import inspect
 import logging
 import signal
 from typing import Callable, Awaitable
@@ -11,40 +12,54 @@ log = logging.getLogger(__name__)
 
 class ShutdownManager:
     def __init__(self):
-        self._closing = asyncio.Event()
-        self._cleanup: list[Callable[[], Awaitable[None]] | Callable[[], None]] = []
+        # Event tworzony dopiero przy działającej pętli (install/wait), nie przy konstrukcji
+        self._closing: asyncio.Event | None = None
+        # Podział przy rejestracji: async uruchamiane razem (gather), sync po nich
+        self._async: list[Callable[[], Awaitable[None]]] = []
+        self._sync: list[Callable[[], None]] = []
 
     def register_cleanup(self, func: Callable[[], Awaitable[None]] | Callable[[], None]):
-        self._cleanup.append(func)
+        (self._async if inspect.iscoroutinefunction(func) else self._sync).append(func)
+
+    def _event(self) -> asyncio.Event:
+        if self._closing is None:
+            self._closing = asyncio.Event()
+        return self._closing
 
     async def wait(self):
-        await self._closing.wait()
+        await self._event().wait()
 
     def install(self, loop: asyncio.AbstractEventLoop):
+        self._event()
         # Windows: signal.SIGINT via default handler may not propagate in some loops
         try:
             loop.add_signal_handler(signal.SIGINT, self.trigger)
             loop.add_signal_handler(signal.SIGTERM, self.trigger)
         except NotImplementedError:
             # Fallback for Windows event loop
-            def _win_sigint_handler(sig, frame):
-                self.trigger()
-            signal.signal(signal.SIGINT, _win_sigint_handler)
-            try:
-                signal.signal(signal.SIGTERM, _win_sigint_handler)
-            except Exception:
-                pass
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    signal.signal(sig, self._signal_handler)
+                except Exception:
+                    pass
+
+    def _signal_handler(self, *_):
+        # Argumenty (sig, frame) odrzucane - bez trzymania referencji do ramki
+        self.trigger()
 
     def trigger(self):
-        if not self._closing.is_set():
+        closing = self._event()
+        if not closing.is_set():
             log.info("Shutdown requested (Ctrl+C)")
-            self._closing.set()
+            closing.set()
 
     async def run_cleanup(self):
-        for fn in self._cleanup:
+        results = await asyncio.gather(*(fn() for fn in self._async), return_exceptions=True)
+        for res in results:
+            if isinstance(res, Exception):
+                log.error("Cleanup error: %s", res)
+        for fn in self._sync:
             try:
-                res = fn()
-                if asyncio.iscoroutine(res):
-                    await res
+                fn()
             except Exception as e:
-                log.error(f"Cleanup error: {e}")
+                log.error("Cleanup error: %s", e)
@@ -2,20 +2,27 @@
 """
 Telemetry Manager - healthcheck & simple metrics (minimal stub)
 """
+import array
 import asyncio
 import logging
-from typing import Dict
+from enum import IntEnum
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class Metric(IntEnum):
+    ERRORS = 0
+    MESSAGES = 1
+    SESSIONS = 2
+
 
 class TelemetryManager:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self._running = False
         self._task = None
-        self._metrics: Dict[str, int] = {
-            "errors": 0,
-            "messages": 0,
-            "sessions": 0,
-        }
+        self._pool_status: Optional[Callable[[], str]] = None
+        # Liczniki w tablicy int64 indeksowanej Metric - bez słownika i hashowania na zdarzenie
+        self._counters = array.array('q', [0] * len(Metric))
 
     async def initialize(self):
         return
@@ -30,21 +37,34 @@ class TelemetryManager:
         self._running = False
         if self._task:
             self._task.cancel()
+            # wait() nie podnosi CancelledError taska, a anulowanie samego shutdown() przechodzi dalej
+            await asyncio.wait((self._task,))
+            self._task = None
 
     async def _loop(self):
         while self._running:
             await asyncio.sleep(60)
-            self.logger.debug(f"Telemetry heartbeat: {self._metrics}")
+            self.logger.debug("Telemetry heartbeat: errors=%d messages=%d sessions=%d", *self._counters)
+            if self._pool_status and self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("DB pool: %s", self._pool_status())
+
+    def watch_db_pool(self, status: Callable[[], str]):
+        """Źródło statystyk puli połączeń logowanych w heartbeat (np. DatabaseManager.pool_status)."""
+        self._pool_status = status
 
     async def record_error(self, msg: str):
-        self._metrics["errors"] += 1
-        self.logger.error(f"Telemetry error: {msg}")
+        self._counters[Metric.ERRORS] += 1
+        self.logger.error("Telemetry error: %s", msg)
 
     def set_sessions(self, count: int):
-        self._metrics["sessions"] = count
+        self._counters[Metric.SESSIONS] = count
 
     def inc_messages(self, n: int = 1):
-        self._metrics["messages"] += n
+        self._counters[Metric.MESSAGES] += n
+
+    def snapshot(self) -> Tuple[int, ...]:
+        """Kopia liczników w kolejności Metric (errors, messages, sessions)."""
+        return tuple(self._counters)
 
-    async def health_check(self) -> Dict[str, str]:
-        return {"status": "ok"}
+    async def health_check(self) -> Dict[str, Any]:
+        return {"status": "ok", **{m.name.lower(): self._counters[m] for m in Metric}}
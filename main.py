@@ -7,48 +7,87 @@ odrpornością na problemy czasowe, bezpieczeństwem i czystą architekturą.
 """
 
 import asyncio
-import logging
+import sys
+from contextlib import AsyncExitStack
 
-from core.bot_manager import BotManager
-from config.settings import Settings
-from infra.logging import setup_logging
+from config.settings import get_settings
+from infra.logging import setup_logging, stop_logging
 from infra.database import DatabaseManager
 from infra.telemetry import TelemetryManager
 from infra.runner import run_with_shutdown
 
 
+def _import_heavy():
+    """Import python-telegram-bot (httpx, ...) poza pętlą - I/O importu nakłada się na start bazy."""
+    from core.bot_manager import BotManager
+    return BotManager
+
+
 class TelegramBotApplication:
     """Główna aplikacja bota Telegram."""
 
+    __slots__ = ("settings", "logger", "db_manager", "bot_manager", "telemetry", "_stack")
+
     def __init__(self):
-        self.settings = Settings()
+        self.settings = get_settings()
         self.logger = setup_logging(self.settings.LOG_LEVEL)
         self.db_manager = None
         self.bot_manager = None
         self.telemetry = None
+        # Sprzątanie rejestrowane w miarę inicjalizacji, zwijane LIFO w shutdown()
+        self._stack = AsyncExitStack()
 
-    async def initialize(self):
-        """Inicjalizacja wszystkich komponentów."""
+    async def __aenter__(self) -> "TelegramBotApplication":
         try:
-            self.logger.info("Inicjalizacja aplikacji bota Telegram...")
-
-            # Inicjalizacja bazy danych
-            self.db_manager = DatabaseManager(self.settings.DB_URL)
-            await self.db_manager.initialize()
-
-            # Inicjalizacja telemetrii
-            self.telemetry = TelemetryManager()
-            await self.telemetry.initialize()
-
-            # Inicjalizacja managera bota
-            self.bot_manager = BotManager(self.settings, self.db_manager, self.telemetry)
-            await self.bot_manager.initialize()
+            await self.initialize()
+        except BaseException as e:
+            self.logger.error("Błąd inicjalizacji: %s", e)
+            # Nie zostawiamy otwartych pul/połączeń po częściowej inicjalizacji
+            await self.shutdown()
+            raise
+        return self
 
-            self.logger.info("Aplikacja zainicjalizowana pomyślnie")
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.shutdown()
 
-        except Exception as e:
-            self.logger.error(f"Błąd inicjalizacji: {e}")
-            raise
+    async def initialize(self):
+        """Inicjalizacja wszystkich komponentów."""
+        # Wyjątki z tasków, których nikt nie awaituje, trafiają do jednego miejsca w logach
+        loop = asyncio.get_running_loop()
+        loop.set_exception_handler(self._on_loop_exception)
+        self.logger.info("Inicjalizacja aplikacji bota Telegram...")
+        self.logger.debug("Pętla zdarzeń: %s.%s", type(loop).__module__, type(loop).__qualname__)
+
+        import_task = asyncio.create_task(asyncio.to_thread(_import_heavy))
+
+        # Baza danych i telemetria są niezależne - inicjalizowane równolegle
+        self.db_manager = DatabaseManager(
+            self.settings.DB_URL,
+            pool_size=self.settings.DB_POOL_SIZE,
+            max_overflow=self.settings.DB_MAX_OVERFLOW,
+            pool_recycle=self.settings.DB_POOL_RECYCLE,
+            pool_pre_ping=self.settings.DB_POOL_PRE_PING,
+        )
+        self.telemetry = TelemetryManager()
+        self.telemetry.watch_db_pool(self.db_manager.pool_status)
+        # Rejestrowane przed init - close()/shutdown() są bezpieczne także po częściowym starcie
+        self._stack.push_async_callback(self._close_infra, self.telemetry, self.db_manager)
+        await asyncio.gather(self.db_manager.initialize(), self.telemetry.initialize())
+        # Heartbeat (liczniki + status puli DB); zatrzymywany w _close_infra
+        await self.telemetry.start()
+
+        # Inicjalizacja managera bota (zależy od obu powyższych)
+        BotManager = await import_task
+        self.bot_manager = BotManager(self.settings, self.db_manager, self.telemetry)
+        # Zdjęty ze stosu przed infrastrukturą: najpierw producenci pracy (bot)
+        self._stack.push_async_callback(self.bot_manager.stop)
+        await self.bot_manager.initialize()
+
+        self.logger.info("Aplikacja zainicjalizowana pomyślnie")
+
+    def _on_loop_exception(self, loop: asyncio.AbstractEventLoop, context: dict):
+        exc = context.get("exception")
+        self.logger.error("Task error: %s", exc or context["message"], exc_info=exc)
 
     async def start(self):
         await self.bot_manager.start()
@@ -58,37 +97,73 @@ class TelegramBotApplication:
         self.logger.info("Zatrzymywanie aplikacji...")
 
         try:
-            if self.bot_manager:
-                await self.bot_manager.stop()
-
-            if self.telemetry:
-                await self.telemetry.shutdown()
-
-            if self.db_manager:
-                await self.db_manager.close()
-
+            await self._stack.aclose()
             self.logger.info("Aplikacja zatrzymana pomyślnie")
 
         except Exception as e:
-            self.logger.error(f"Błąd podczas zatrzymywania: {e}")
+            self.logger.error("Błąd podczas zatrzymywania: %s", e)
+        finally:
+            self.bot_manager = self.telemetry = self.db_manager = None
+            stop_logging(self.logger)
+
+    async def _close_infra(self, telemetry: TelemetryManager, db_manager: DatabaseManager):
+        """Telemetria i baza zamykane równolegle; błędy logowane osobno."""
+        results = await asyncio.gather(telemetry.shutdown(), db_manager.close(), return_exceptions=True)
+        for res in results:
+            if isinstance(res, Exception):
+                self.logger.error("Błąd podczas zatrzymywania: %s", res)
 
 
 async def main():
     """Główna funkcja aplikacji."""
-    app = TelegramBotApplication()
+    # Czas życia zasobów związany z blokiem async with - zamknięcie także po częściowej inicjalizacji
+    async with TelegramBotApplication() as app:
+        await run_with_shutdown(app.start)
 
-    async def _run():
-        await app.initialize()
-        await app.start()
 
-    await run_with_shutdown(_run, cleanup_coros=[app.shutdown])
+def _loop_factory():
+    """uvloop (POSIX) / winloop (Windows) jeśli zainstalowane; None = domyślna pętla asyncio."""
+    try:
+        if sys.platform == "win32":
+            import winloop as fast_loop
+        else:
+            import uvloop as fast_loop
+    except ImportError:
+        return None
+    return fast_loop.new_event_loop
+
+
+def _run(coro):
+    """
+    Jak asyncio.run, ale bez anulowania wszystkich pozostałych tasków przy wyjściu:
+    komponenty zatrzymują swoje taski w shutdown(), więc zamykamy tylko pętlę.
+    """
+    factory = _loop_factory()
+    loop = factory() if factory else asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    task = loop.create_task(coro)
+    try:
+        return loop.run_until_complete(task)
+    except KeyboardInterrupt:
+        # Ctrl+C przed instalacją handlerów sygnałów (np. w initialize()) - anulujemy
+        # tylko główny task, żeby __aexit__/shutdown() zdążyły posprzątać
+        task.cancel()
+        try:
+            loop.run_until_complete(task)
+        except (asyncio.CancelledError, KeyboardInterrupt):
+            pass
+        raise
+    finally:
+        try:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.run_until_complete(loop.shutdown_default_executor())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
 
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        _run(main())
     except KeyboardInterrupt:
         print("\nAplikacja przerwana przez użytkownika")
-    except Exception as e:
-        print(f"Krytyczny błąd: {e}")
-        raise